@@ -0,0 +1,232 @@
+"""
+Бенчмарк слоя хранения (db.database.Database) на синтетических данных
+
+Создаёт временную базу SQLite, заполняет её пользователями и ставками
+и замеряет основные операции. Результат - JSON с ops/sec, p50/p99 и размером файла.
+
+Запуск из корня проекта:
+    python -m benchmarks.db_benchmark --users 100000 --bets 1000000
+    python -m benchmarks.db_benchmark --users 1000000 --bets 10000000 --output bench.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from db.database import Database
+from db.models import User, Bet
+
+# Боёв в одном турнире синтетических данных
+FIGHTS_PER_TOURNAMENT = 12
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Перцентиль по отсортированной выборке (nearest-rank)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(name: str, func: Callable[[int], int], iterations: int) -> Dict:
+    """
+    Выполняет func(i) iterations раз и собирает задержки
+    func возвращает количество обработанных объектов (для ops/sec)
+    """
+    latencies = []
+    items = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        items += func(i)
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+
+    result = {
+        "iterations": iterations,
+        "items": items,
+        "total_sec": round(total, 4),
+        "ops_per_sec": round(items / total, 1) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+    print(f"{name:<28} {result['ops_per_sec']:>14,.1f} ops/s  "
+          f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms", file=sys.stderr)
+    return result
+
+
+def seed_users(database: Database, count: int, batch: int):
+    """Заполняет базу пользователями через буфер add_or_update_user"""
+    for user_id in range(1, count + 1):
+        database.add_or_update_user(User(user_id, f"user{user_id}", f"Name{user_id}"))
+        if user_id % batch == 0:
+            database.flush_users()
+    database.flush_users()
+
+
+def seed_bets(database: Database, users: int, count: int, batch: int) -> int:
+    """
+    Заполняет базу ставками: каждый пользователь ставит на все бои турнира,
+    турниров создаётся столько, сколько нужно для count ставок
+    Возвращает количество турниров
+    """
+    per_tournament = users * FIGHTS_PER_TOURNAMENT
+    tournaments = max(1, -(-count // per_tournament))
+    buffer = []
+    written = 0
+    for n in range(count):
+        tournament = n // per_tournament
+        offset = n % per_tournament
+        user_id = offset // FIGHTS_PER_TOURNAMENT + 1
+        fight_index = offset % FIGHTS_PER_TOURNAMENT
+        choice = "fighter1" if (user_id + fight_index) % 2 else "fighter2"
+        buffer.append(Bet(None, user_id, f"bench_{tournament}", fight_index, choice, 1))
+        if len(buffer) >= batch:
+            written += database.add_bets(buffer)
+            buffer = []
+    if buffer:
+        written += database.add_bets(buffer)
+    return tournaments
+
+
+def run(args) -> Dict:
+    """Заполняет временную базу и прогоняет замеры"""
+    workdir = tempfile.mkdtemp(prefix="ufc_bot_bench_")
+    db_path = os.path.join(workdir, "bench.db")
+    report = {
+        "config": {
+            "users": args.users,
+            "bets": args.bets,
+            "batch": args.batch,
+            "iterations": args.iterations,
+        },
+        "operations": {},
+    }
+    ops = report["operations"]
+
+    try:
+        database = Database(db_path)
+
+        t0 = time.perf_counter()
+        seed_users(database, args.users, args.batch)
+        report["seed_users_sec"] = round(time.perf_counter() - t0, 2)
+
+        t0 = time.perf_counter()
+        tournaments = seed_bets(database, args.users, args.bets, args.batch)
+        report["seed_bets_sec"] = round(time.perf_counter() - t0, 2)
+        report["config"]["tournaments"] = tournaments
+
+        iterations = args.iterations
+        first_new_id = args.users + 1
+
+        # Регистрация новых пользователей (/start) и повторные касания
+        ops["add_or_update_user_new"] = measure(
+            "add_or_update_user (new)",
+            lambda i: database.add_or_update_user(User(first_new_id + i, "new")) or 1,
+            iterations
+        )
+        ops["add_or_update_user_existing"] = measure(
+            "add_or_update_user (touch)",
+            lambda i: database.add_or_update_user(User(i % args.users + 1, "touch")) or 1,
+            iterations
+        )
+        ops["flush_users"] = measure(
+            "flush_users",
+            lambda i: database.flush_users() or 1,
+            1
+        )
+
+        ops["get_users_count"] = measure("get_users_count", lambda i: database.get_users_count() and 1, iterations)
+        ops["get_user"] = measure("get_user", lambda i: database.get_user(i % args.users + 1) and 1, iterations)
+        ops["get_all_users"] = measure(
+            "get_all_users",
+            lambda i: len(database.get_all_users(only_active=False)),
+            max(1, args.scan_iterations)
+        )
+        ops["iter_user_ids"] = measure(
+            "iter_user_ids",
+            lambda i: sum(len(chunk) for chunk in database.iter_user_ids(chunk_size=1000)),
+            max(1, args.scan_iterations)
+        )
+
+        # Ставки: одиночный upsert (смена выбора) и пачка
+        ops["add_bet"] = measure(
+            "add_bet",
+            lambda i: database.add_bet(
+                Bet(None, i % args.users + 1, "bench_0", i % FIGHTS_PER_TOURNAMENT, "fighter1")
+            ) and 1,
+            iterations
+        )
+        ops["add_bets_batch"] = measure(
+            "add_bets (batch)",
+            lambda i: database.add_bets([
+                Bet(None, user_id, f"bench_extra_{i}", 0, "fighter2")
+                for user_id in range(1, min(args.users, args.batch) + 1)
+            ]),
+            max(1, args.scan_iterations)
+        )
+        ops["get_user_bets"] = measure(
+            "get_user_bets",
+            lambda i: len(database.get_user_bets(i % args.users + 1, "bench_0")) or 1,
+            iterations
+        )
+
+        # Сканы по турниру (статистика и расчёт)
+        ops["tournament_bet_scan"] = measure(
+            "get_fight_bet_counts",
+            lambda i: database.get_fight_bet_counts(f"bench_{i % tournaments}") and 1,
+            max(1, args.scan_iterations)
+        )
+        winners = {
+            i: ("fighter1" if i % 2 else "fighter2", 1.8, 2.1)
+            for i in range(FIGHTS_PER_TOURNAMENT)
+        }
+        ops["settle_fights"] = measure(
+            "settle_fights",
+            lambda i: database.settle_fights(f"bench_{i % tournaments}", winners)["bets"],
+            1
+        )
+
+        database.close()
+        report["db_size_bytes"] = sum(
+            os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)
+        )
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            report["db_path"] = db_path
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк хранилища SQLite бота")
+    parser.add_argument("--users", type=int, default=10_000, help="пользователей (до 1M)")
+    parser.add_argument("--bets", type=int, default=100_000, help="ставок (до 10M)")
+    parser.add_argument("--batch", type=int, default=10_000, help="размер пачки при заполнении")
+    parser.add_argument("--iterations", type=int, default=2_000, help="повторов точечных операций")
+    parser.add_argument("--scan-iterations", type=int, default=3, help="повторов тяжёлых сканов")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    parser.add_argument("--keep", action="store_true", help="не удалять временную базу")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Бенчмарк клиента ESPN (utils.espn_client.UFCAPIClient) без сети
+
+Поднимает в том же процессе заглушку benchmarks.espn_stub_server (или берёт
+внешний адрес --base-url) и замеряет путь загрузки: разбор документа, полный
+запрос 200, условный запрос 304, попадание в кэш и одновременные вызовы
+(single-flight). Результат - JSON с ops/sec, p50/p99 и числом запросов к заглушке.
+
+Запуск из корня проекта:
+    python -m benchmarks.espn_client_benchmark --events 50 --iterations 500
+    python -m benchmarks.espn_client_benchmark --latency-ms 50 --error-rate 0.2 --output espn.json
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.db_benchmark import percentile
+from benchmarks.espn_stub_server import add_stub_arguments, create_app, load_fixture, start_server
+from utils.espn_client import UFCAPIClient
+from utils.http_cache import HTTPDiskCache
+
+
+def summarize(name: str, latencies, items: int, total: float) -> Dict:
+    """Сводка замера в формате db_benchmark"""
+    result = {
+        "iterations": len(latencies),
+        "items": items,
+        "total_sec": round(total, 4),
+        "ops_per_sec": round(items / total, 1) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+    print(f"{name:<28} {result['ops_per_sec']:>14,.1f} ops/s  "
+          f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms", file=sys.stderr)
+    return result
+
+
+async def measure(name: str, func: Callable[[int], Awaitable[int]], iterations: int) -> Dict:
+    """Последовательно выполняет await func(i) iterations раз (func возвращает число объектов)"""
+    latencies = []
+    items = 0
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        items += await func(i)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, items, time.perf_counter() - started)
+
+
+async def measure_concurrent(client: UFCAPIClient, callers: int, rounds: int) -> Dict:
+    """
+    callers одновременных вызовов на пустом кэше, rounds раз: задержка
+    каждого вызова и сколько запросов ушло наружу (ожидается 1 на раунд)
+    """
+    latencies = []
+    items = 0
+
+    async def timed_call() -> int:
+        t0 = time.perf_counter()
+        events = await client.get_upcoming_events()
+        latencies.append(time.perf_counter() - t0)
+        return len(events)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        client.clear_cache()
+        items += sum(await asyncio.gather(*(timed_call() for _ in range(callers))))
+    return summarize(f"concurrent x{callers}", latencies, items, time.perf_counter() - started)
+
+
+async def run(args) -> Dict:
+    """Поднимает заглушку и прогоняет замеры клиента"""
+    workdir = tempfile.mkdtemp(prefix="ufc_bot_espn_bench_")
+    report = {
+        "config": {
+            "events": args.events,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "etag": not args.no_etag,
+        },
+        "operations": {},
+    }
+    ops = report["operations"]
+    runner = None
+    client = None
+
+    try:
+        body = load_fixture(args.fixture, args.tournament, args.events)
+        report["payload_bytes"] = len(body)
+        stats = None
+        base_url = args.base_url
+        if base_url is None:
+            app = create_app(
+                body, args.latency_ms, args.jitter_ms, args.error_rate, not args.no_etag, args.seed
+            )
+            stats = app["stats"]
+            runner, base_url = await start_server(app)
+        report["config"]["base_url"] = base_url
+
+        client = UFCAPIClient(base_url=base_url, http_cache=HTTPDiskCache(workdir))
+        iterations = args.iterations
+        data = json.loads(body)
+
+        # Разбор документа в снимок (без сети)
+        async def build_snapshot(i: int) -> int:
+            return len(client._build_snapshot(data).by_id)
+
+        ops["build_snapshot"] = await measure("build_snapshot", build_snapshot, iterations)
+
+        # Полный запрос: ни снимка в памяти, ни тела на диске
+        async def cold_fetch(i: int) -> int:
+            client.clear_cache()
+            shutil.rmtree(workdir, ignore_errors=True)
+            client.http_cache = HTTPDiskCache(workdir)
+            return len(await client.get_upcoming_events())
+
+        ops["fetch_200"] = await measure("fetch 200 (cold)", cold_fetch, iterations)
+
+        # Условный запрос: снимок устарел, тело и ETag на диске
+        async def conditional_fetch(i: int) -> int:
+            client.clear_cache()
+            return len(await client.get_upcoming_events())
+
+        ops["fetch_304"] = await measure("fetch 304 (conditional)", conditional_fetch, iterations)
+
+        # Снимок в памяти свежий - сеть не нужна
+        async def cache_hit(i: int) -> int:
+            return len(await client.get_upcoming_events())
+
+        ops["cache_hit"] = await measure("cache hit", cache_hit, iterations)
+
+        requests_before = stats["requests"] if stats else None
+        ops["concurrent"] = await measure_concurrent(
+            client, args.concurrency, max(1, iterations // args.concurrency)
+        )
+        if stats:
+            ops["concurrent"]["upstream_requests"] = stats["requests"] - requests_before
+            report["stub_responses"] = dict(stats)
+        report["client_status"] = client.status()
+    finally:
+        if client is not None:
+            await client.close()
+        if runner is not None:
+            await runner.cleanup()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк клиента ESPN на локальной заглушке")
+    parser.add_argument("--base-url", help="внешняя заглушка (по умолчанию - своя в процессе)")
+    parser.add_argument("--iterations", type=int, default=200, help="повторов каждого замера")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных вызовов")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    add_stub_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Локальная заглушка ESPN API для нагрузочных тестов UFCAPIClient без сети
+
+Отдаёт /scoreboard из фикстуры: по умолчанию документ в формате ESPN строится
+из data/current_tournament.json, либо (--fixture) повторяется записанный ответ
+ESPN, например тело из data/http_cache. Задержка, доля ошибок и размер ответа
+настраиваются; ETag/304 поддерживаются, как у настоящего ESPN.
+
+Запуск из корня проекта:
+    python -m benchmarks.espn_stub_server --port 8080 --events 50 --latency-ms 80
+    ESPN_BASE_URL=http://127.0.0.1:8080 python main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+DEFAULT_TOURNAMENT = "data/current_tournament.json"
+
+# Формат даты турнира в data/current_tournament.json и в ответе ESPN
+TOURNAMENT_DATE_FORMAT = "%d.%m.%Y %H:%M"
+ESPN_DATE_FORMAT = "%Y-%m-%dT%H:%MZ"
+
+
+def build_event(tournament: Dict[str, Any], event_id: str, start: datetime) -> Dict[str, Any]:
+    """Событие в формате ESPN scoreboard по турниру бота"""
+    city, _, rest = tournament.get("location", "").partition(", ")
+    state, _, country = rest.partition(", ")
+    competitions = []
+    for order, fight in enumerate(tournament.get("fights", []), 1):
+        competitions.append({
+            "id": f"{event_id}{order:02d}",
+            "order": order,
+            "type": {"slug": "main" if fight.get("type") == "Главный" else "prelim"},
+            "competitors": [
+                {"athlete": {"displayName": fight.get("fighter1")}},
+                {"athlete": {"displayName": fight.get("fighter2")}},
+            ],
+            "venue": {
+                "fullName": tournament.get("location", ""),
+                "address": {"city": city, "state": state, "country": country},
+            },
+        })
+    # ESPN отдаёт бои от предварительных к главному, клиент их переворачивает
+    competitions.reverse()
+    return {
+        "id": event_id,
+        "name": tournament.get("name"),
+        "date": start.strftime(ESPN_DATE_FORMAT),
+        "season": {"slug": "ufc"},
+        "competitions": competitions,
+    }
+
+
+def build_scoreboard(tournament: Dict[str, Any], events: int = 1) -> Dict[str, Any]:
+    """
+    Документ scoreboard из events копий турнира (размер ответа растёт линейно)
+    Копии получают свои id и даты через неделю друг от друга
+    """
+    try:
+        start = datetime.strptime(tournament.get("date", ""), TOURNAMENT_DATE_FORMAT)
+    except ValueError:
+        start = datetime(2026, 1, 1, 22, 0)
+    start = start.replace(tzinfo=timezone.utc)
+    base_id = int(tournament.get("id") or 600000000)
+    return {
+        "leagues": [{"slug": "ufc", "name": "UFC"}],
+        "events": [
+            build_event(tournament, str(base_id + n), start + timedelta(weeks=n))
+            for n in range(max(1, events))
+        ],
+    }
+
+
+def load_fixture(fixture: Optional[str], tournament_path: str, events: int) -> bytes:
+    """Тело ответа: записанный ответ ESPN как есть или документ по турниру бота"""
+    if fixture:
+        with open(fixture, "rb") as f:
+            return f.read()
+    with open(tournament_path, "r", encoding="utf-8") as f:
+        tournament = json.load(f)
+    return json.dumps(build_scoreboard(tournament, events), ensure_ascii=False).encode("utf-8")
+
+
+def create_app(
+    body: bytes,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    etag: bool = True,
+    seed: Optional[int] = 0
+) -> web.Application:
+    """
+    Приложение заглушки. app["stats"] - счётчики ответов по статусам
+    seed делает задержки и ошибки воспроизводимыми между прогонами
+    """
+    rng = random.Random(seed)
+    etag_value = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+    stats: Dict[str, int] = {"requests": 0, "200": 0, "304": 0, "503": 0}
+
+    async def scoreboard(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        delay = latency_ms + (rng.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if error_rate and rng.random() < error_rate:
+            stats["503"] += 1
+            return web.Response(status=503, text="stub: injected error")
+        if etag and request.headers.get("If-None-Match") == etag_value:
+            stats["304"] += 1
+            return web.Response(status=304, headers={"ETag": etag_value})
+        stats["200"] += 1
+        headers = {"ETag": etag_value} if etag else {}
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/scoreboard", scoreboard)
+    return app
+
+
+async def start_server(app: web.Application, host: str = "127.0.0.1", port: int = 0):
+    """Запускает приложение в текущем event loop. Возвращает (runner, base_url)"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Параметры заглушки (общие с бенчмарком клиента)"""
+    parser.add_argument("--fixture", help="записанный ответ ESPN scoreboard (JSON) вместо турнира")
+    parser.add_argument("--tournament", default=DEFAULT_TOURNAMENT, help="турнир бота для фикстуры")
+    parser.add_argument("--events", type=int, default=1, help="событий в ответе (размер фикстуры)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="разброс задержки +-")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503 (0..1)")
+    parser.add_argument("--no-etag", action="store_true", help="не отдавать ETag (без 304)")
+    parser.add_argument("--seed", type=int, default=0, help="seed задержек и ошибок")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Заглушка ESPN API для бенчмарков")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_stub_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    body = load_fixture(args.fixture, args.tournament, args.events)
+    app = create_app(body, args.latency_ms, args.jitter_ms, args.error_rate, not args.no_etag, args.seed)
+    print(f"ESPN stub: http://{args.host}:{args.port}/scoreboard ({len(body):,} байт)", file=sys.stderr)
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Асинхронная обёртка над Database для использования из хэндлеров aiogram
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .database import Database, db
+from .models import User, Bet, UserScore
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """
+    Выполняет запросы к Database в отдельном потоке-воркере,
+    чтобы запись на диск не блокировала event loop бота.
+    Один поток = одна очередь запросов, порядок операций сохраняется.
+    """
+
+    def __init__(self, database: Database):
+        self.db = database
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_future: Optional[asyncio.Future] = None
+
+    async def _run(self, func, *args, **kwargs):
+        """Ставит вызов в очередь потока БД и ждёт результат"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    # ========== ПОЛЬЗОВАТЕЛИ ==========
+
+    async def add_or_update_user(self, user: User) -> bool:
+        """
+        Отвечает сразу из буфера в памяти, не вставая в очередь потока БД
+        (там может идти долгий расчёт ставок). Сброс на диск ставится в очередь
+        """
+        is_new = self.db.add_or_update_user(user, flush=False)
+        if self.db.flush_due() and (self._flush_future is None or self._flush_future.done()):
+            loop = asyncio.get_running_loop()
+            self._flush_future = loop.run_in_executor(self._executor, self.db.flush_users)
+        return is_new
+
+    async def get_user(self, user_id: int) -> Optional[User]:
+        return await self._run(self.db.get_user, user_id)
+
+    async def get_all_users(self, only_active: bool = True) -> List[User]:
+        return await self._run(self.db.get_all_users, only_active)
+
+    async def get_users_count(self) -> int:
+        # Число известных ID в памяти - очередь потока БД не нужна
+        return self.db.get_users_count()
+
+    async def iter_user_ids(
+        self,
+        chunk_size: int = 1000,
+        active_days: Optional[int] = None,
+        exclude_blocked: bool = True
+    ) -> AsyncIterator[List[int]]:
+        """Асинхронно отдаёт ID пользователей пачками, каждая пачка - отдельный запрос"""
+        await self.flush_users()
+        after_user_id = 0
+        while True:
+            chunk = await self._run(
+                self.db.get_user_ids_chunk, after_user_id, chunk_size, active_days, exclude_blocked
+            )
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after_user_id = chunk[-1]
+
+    async def mark_user_blocked(self, user_id: int, blocked: bool = True) -> bool:
+        return await self._run(self.db.mark_user_blocked, user_id, blocked)
+
+    async def flush_users(self) -> int:
+        return await self._run(self.db.flush_users)
+
+    # ========== СТАВКИ ==========
+
+    async def add_bet(self, bet: Bet) -> bool:
+        return await self._run(self.db.add_bet, bet)
+
+    async def add_bets(self, bets: List[Bet]) -> int:
+        return await self._run(self.db.add_bets, bets)
+
+    async def get_user_bets(self, user_id: int, tournament_id: str) -> List[Bet]:
+        return await self._run(self.db.get_user_bets, user_id, tournament_id)
+
+    async def get_fight_bet_counts(self, tournament_id: str) -> Dict[int, Dict[str, int]]:
+        return await self._run(self.db.get_fight_bet_counts, tournament_id)
+
+    # ========== ТУРНИРЫ ==========
+    # Записи реестра турниров (utils/json_storage.py) идут в ту же очередь,
+    # что и расчёт ставок: event loop не ждёт блокировку базы
+
+    async def save_tournament(self, tournament: Dict[str, Any]) -> bool:
+        return await self._run(self.db.save_tournament, tournament)
+
+    async def update_tournament(
+        self,
+        tournament_id: str,
+        fight_updates: Optional[Dict[int, Dict[str, Any]]] = None,
+        **fields: Any
+    ) -> bool:
+        return await self._run(self.db.update_tournament, tournament_id, fight_updates, **fields)
+
+    async def add_fights(self, tournament_id: str, fights: Dict[int, Dict[str, Any]]) -> bool:
+        return await self._run(self.db.add_fights, tournament_id, fights)
+
+    async def get_tournament_ids(self, tournament_ids: List[str]) -> set:
+        return await self._run(self.db.get_tournament_ids, tournament_ids)
+
+    async def get_tournament_totals(self, tournament_id: str) -> Dict[str, Any]:
+        return await self._run(self.db.get_tournament_totals, tournament_id)
+
+    # ========== РАСЧЁТ СТАВОК ==========
+
+    async def settle_fights(
+        self,
+        tournament_id: str,
+        results: Dict[int, Tuple[str, float, float]]
+    ) -> Dict[str, Any]:
+        return await self._run(self.db.settle_fights, tournament_id, results)
+
+    async def has_unsettled_bets(self, tournament_id: str) -> bool:
+        return await self._run(self.db.has_unsettled_bets, tournament_id)
+
+    # ========== ТАБЛИЦА ЛИДЕРОВ ==========
+
+    async def get_top_scores(self, limit: int = 10) -> List[UserScore]:
+        return await self._run(self.db.get_top_scores, limit)
+
+    async def get_user_score(self, user_id: int) -> Optional[UserScore]:
+        return await self._run(self.db.get_user_score, user_id)
+
+    async def get_user_rank(self, user_id: int) -> Optional[int]:
+        return await self._run(self.db.get_user_rank, user_id)
+
+    # ========== ФОНОВЫЙ СБРОС БУФЕРА ==========
+
+    async def _flush_loop(self):
+        """Периодически сбрасывает буфер пользователей, даже если новых /start нет"""
+        interval = self.db.flush_interval_ms / 1000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_users()
+            except Exception as e:
+                logger.error(f"Ошибка фонового сброса пользователей: {e}")
+
+    def start(self):
+        """Запускает фоновый сброс буфера (вызывается из main.py внутри event loop)"""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    def close(self):
+        """Дожидается выполнения очереди и останавливает поток БД"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._executor.shutdown(wait=True)
+        logger.info("Поток базы данных остановлен")
+
+
+# Глобальный асинхронный экземпляр поверх общего db
+async_db = AsyncDatabase(db)
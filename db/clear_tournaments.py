@@ -16,7 +16,8 @@ def clear_tournaments():
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Удаляем все записи из таблицы tournaments
+        # Удаляем все записи из таблиц fights и tournaments
+        cursor.execute("DELETE FROM fights")
         cursor.execute("DELETE FROM tournaments")
         
         # Сбрасываем autoincrement
@@ -4,262 +4,978 @@
 import sqlite3
 import json
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from pathlib import Path
 
-from .models import User, Tournament, Bet
+from .models import User, Bet, UserScore
+from .migrations import apply_migrations
 
 logger = logging.getLogger(__name__)
 
+# Порядок колонок совпадает с порядком аргументов конструкторов моделей,
+# поэтому объекты собираются прямо из кортежа строки, без sqlite3.Row и парсинга дат
+USER_COLUMNS = "user_id, username, first_name, last_name, created_at, last_active, is_admin"
+BET_COLUMNS = "bet_id, user_id, tournament_id, fight_index, fighter_choice, amount, created_at"
+TOURNAMENT_COLUMNS = (
+    "tournament_id, name, date, location, status, bets_open, has_odds, selected_at, updated_at, extra"
+)
+FIGHT_COLUMNS = (
+    "fighter1, fighter2, card_type, fight_order, fighter1_odds, fighter2_odds, winner, status, extra"
+)
+
+# Поля словаря турнира/боя, у которых есть свои колонки (остальные - в JSON колонке extra)
+TOURNAMENT_KEYS = {"id", "name", "date", "location", "fights", "status", "bets_open", "has_odds", "_meta"}
+FIGHT_KEYS = {"fighter1", "fighter2", "type", "order", "odds", "winner", "status"}
+
+# Поле словаря -> колонка, для частичных обновлений
+TOURNAMENT_UPDATABLE = {
+    "name": "name", "date": "date", "location": "location",
+    "status": "status", "bets_open": "bets_open", "has_odds": "has_odds",
+}
+FIGHT_UPDATABLE = {
+    "fighter1": "fighter1", "fighter2": "fighter2", "type": "card_type",
+    "order": "fight_order", "winner": "winner", "status": "status",
+}
+# Статус снятого боя в карде турнира (fights.status)
+CANCELLED = "cancelled"
+SCORE_COLUMNS = "s.user_id, s.points, s.wins, s.bets, s.staked, s.returned, COALESCE(u.first_name, u.username)"
+
+
+def user_row_factory(cursor: sqlite3.Cursor, row: tuple) -> User:
+    """row_factory курсора: строка users -> User"""
+    return User(*row)
+
+
+def bet_row_factory(cursor: sqlite3.Cursor, row: tuple) -> Bet:
+    """row_factory курсора: строка bets -> Bet"""
+    return Bet(*row)
+
+
+def score_row_factory(cursor: sqlite3.Cursor, row: tuple) -> UserScore:
+    """row_factory курсора: строка user_scores (+ имя) -> UserScore"""
+    return UserScore(*row)
+
 
 class Database:
-    def __init__(self, db_path: str = "db/ufc_bot.db"):
+    # Сколько подготовленных выражений sqlite3 держит в кэше соединения
+    STATEMENT_CACHE_SIZE = 256
+    
+    def __init__(
+        self,
+        db_path: str = "db/ufc_bot.db",
+        cache_size_kb: int = 16384,
+        flush_interval_ms: int = 500,
+        flush_max_rows: int = 500
+    ):
         self.db_path = db_path
-        self._create_tables()
+        self.cache_size_kb = cache_size_kb
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_max_rows = flush_max_rows
+        # Одно долгоживущее соединение на весь процесс + блокировка для потоков
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+        self._migrate()
+        
+        # Отложенная запись пользователей: user_id -> строка для upsert.
+        # Буфер под своей блокировкой: касание пользователя не ждёт запросов,
+        # которые держат соединение (например расчёт ставок)
+        self._users_lock = threading.Lock()
+        self._pending_users: Dict[int, tuple] = {}
+        self._last_flush = time.monotonic()
+        # Все известные user_id - чтобы без запроса к БД отвечать "новый ли пользователь"
+        self._known_users = self._load_known_users()
         logger.info(f"База данных инициализирована: {db_path}")
     
-    def _get_connection(self):
-        """Создаёт соединение с базой данных"""
-        Path("db").mkdir(exist_ok=True)  # Создаём папку если её нет
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение один раз при старте и настраивает PRAGMA"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)  # Создаём папку если её нет
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,  # Соединение защищено self._lock
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
         conn.row_factory = sqlite3.Row  # Чтобы получать строки как словари
+        
+        # WAL: читатели не блокируют писателя, запись без лишних fsync
+        conn.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL NORMAL безопасен и заметно быстрее FULL
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Отрицательное значение - размер кэша страниц в килобайтах
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
         return conn
     
-    def _create_tables(self):
-        """Создаёт таблицы если они не существуют"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Таблица пользователей
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_admin BOOLEAN DEFAULT FALSE
-                )
-            """)
-            
-            # Таблица турниров
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tournaments (
-                    tournament_id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    date TEXT,
-                    location TEXT,
-                    fights TEXT,  -- JSON список боёв
-                    status TEXT DEFAULT 'active',
-                    bets_open BOOLEAN DEFAULT TRUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Таблица ставок
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bets (
-                    bet_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    tournament_id TEXT NOT NULL,
-                    fight_index INTEGER NOT NULL,
-                    fighter_choice TEXT NOT NULL,
-                    amount INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (user_id),
-                    FOREIGN KEY (tournament_id) REFERENCES tournaments (tournament_id)
-                )
-            """)
-            
-            conn.commit()
-            logger.info("Таблицы базы данных созданы/проверены")
+    @contextmanager
+    def _get_connection(self):
+        """
+        Выдаёт общее соединение с базой данных
+        Блок выполняется как одна транзакция: commit при успехе, rollback при ошибке
+        """
+        with self._lock, self._conn:
+            yield self._conn
+    
+    def close(self):
+        """Закрывает соединение с базой данных (при остановке бота)"""
+        with self._lock:
+            self.flush_users()
+            try:
+                self._conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            self._conn.close()
+        logger.info("Соединение с базой данных закрыто")
+    
+    def _migrate(self):
+        """Создаёт/обновляет схему базы данных версионными миграциями"""
+        with self._lock:
+            version = apply_migrations(self._conn)
+        logger.info(f"Таблицы базы данных созданы/проверены (версия схемы {version})")
     
     # ========== МЕТОДЫ ДЛЯ ПОЛЬЗОВАТЕЛЕЙ ==========
     
-    def add_or_update_user(self, user: User) -> bool:
+    def _load_known_users(self) -> set:
+        """Загружает ID всех зарегистрированных пользователей в память"""
+        with self._get_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT user_id FROM users")}
+    
+    def flush_due(self) -> bool:
+        """Пора ли сбрасывать буфер: набралось M строк или прошло N мс"""
+        if len(self._pending_users) >= self.flush_max_rows:
+            return True
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        return elapsed_ms >= self.flush_interval_ms
+    
+    def add_or_update_user(self, user: User, flush: bool = True) -> bool:
         """
         Добавляет или обновляет пользователя
         Возвращает True если пользователь новый, False если обновлён существующий
+        
+        Запись откладывается в буфер и сбрасывается пачкой (flush_users),
+        повторные касания одного пользователя сливаются в одну строку.
+        flush=False - только буфер в памяти, без записи на диск (из event loop)
         """
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Проверяем, есть ли уже пользователь
-                cursor.execute(
-                    "SELECT user_id FROM users WHERE user_id = ?",
-                    (user.user_id,)
+            with self._users_lock:
+                is_new = user.user_id not in self._known_users
+                self._known_users.add(user.user_id)
+                self._pending_users[user.user_id] = (
+                    user.user_id, user.username, user.first_name, user.last_name,
+                    user.is_admin, user.created_at.isoformat(), user.last_active.isoformat()
                 )
-                exists = cursor.fetchone()
-                
-                if exists:
-                    # Обновляем существующего
-                    cursor.execute("""
-                        UPDATE users 
-                        SET username = ?, first_name = ?, last_name = ?, 
-                            last_active = CURRENT_TIMESTAMP
-                        WHERE user_id = ?
-                    """, (user.username, user.first_name, user.last_name, user.user_id))
-                    logger.info(f"Пользователь обновлён: {user.user_id}")
-                    return False
-                else:
-                    # Добавляем нового
-                    cursor.execute("""
-                        INSERT INTO users 
-                        (user_id, username, first_name, last_name, is_admin, created_at, last_active)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        user.user_id, user.username, user.first_name, user.last_name,
-                        user.is_admin, user.created_at.isoformat(), user.last_active.isoformat()
-                    ))
-                    logger.info(f"Новый пользователь добавлен: {user.user_id}")
-                    return True
-                
-                conn.commit()
-                return True
+            if flush and self.flush_due():
+                self.flush_users()
+            
+            if is_new:
+                logger.info(f"Новый пользователь добавлен: {user.user_id}")
+            return is_new
         except Exception as e:
             logger.error(f"Ошибка при добавлении пользователя {user.user_id}: {e}")
             return False
     
+    def flush_users(self) -> int:
+        """
+        Записывает накопленные изменения пользователей одной транзакцией
+        Возвращает количество записанных строк
+        
+        Буфер забирается целиком под блокировкой буфера, запись идёт уже без неё:
+        новые касания пользователей копятся в новом буфере, пока идёт запись
+        """
+        # Блокировка соединения на весь сброс - сбросы не обгоняют друг друга
+        with self._lock:
+            with self._users_lock:
+                if not self._pending_users:
+                    self._last_flush = time.monotonic()
+                    return 0
+                pending, self._pending_users = self._pending_users, {}
+            
+            rows = list(pending.values())
+            try:
+                with self._get_connection() as conn:
+                    conn.executemany("""
+                        INSERT INTO users 
+                        (user_id, username, first_name, last_name, is_admin, created_at, last_active)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            username = excluded.username,
+                            first_name = excluded.first_name,
+                            last_name = excluded.last_name,
+                            last_active = excluded.last_active,
+                            is_blocked = FALSE  -- написал боту, значит снова доступен
+                    """, rows)
+            except Exception as e:
+                # Возвращаем строки в буфер (более свежие касания важнее) -
+                # попробуем записать при следующем сбросе
+                with self._users_lock:
+                    pending.update(self._pending_users)
+                    self._pending_users = pending
+                logger.error(f"Ошибка при записи пользователей ({len(rows)} шт.): {e}")
+                return 0
+            
+            with self._users_lock:
+                self._last_flush = time.monotonic()
+            logger.debug(f"Записано пользователей: {len(rows)}")
+            return len(rows)
+    
     def get_user(self, user_id: int) -> Optional[User]:
         """Получает пользователя по ID"""
+        self.flush_users()
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = user_row_factory
                 cursor.execute(
-                    "SELECT * FROM users WHERE user_id = ?",
+                    f"SELECT {USER_COLUMNS} FROM users WHERE user_id = ?",
                     (user_id,)
                 )
-                row = cursor.fetchone()
-                
-                if row:
-                    return User(
-                        user_id=row['user_id'],
-                        username=row['username'],
-                        first_name=row['first_name'],
-                        last_name=row['last_name'],
-                        created_at=datetime.fromisoformat(row['created_at']),
-                        last_active=datetime.fromisoformat(row['last_active']),
-                        is_admin=bool(row['is_admin'])
-                    )
-                return None
+                return cursor.fetchone()
         except Exception as e:
             logger.error(f"Ошибка при получении пользователя {user_id}: {e}")
             return None
     
     def get_all_users(self, only_active: bool = True) -> List[User]:
         """Получает всех пользователей"""
+        self.flush_users()
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = user_row_factory
                 
                 if only_active:
-                    # Только активные за последние 30 дней
-                    cursor.execute("""
-                        SELECT * FROM users 
-                        WHERE last_active > datetime('now', '-30 days')
+                    # Только активные за последние 30 дней (last_active - локальное время ISO)
+                    cursor.execute(f"""
+                        SELECT {USER_COLUMNS} FROM users 
+                        WHERE last_active > ?
                         ORDER BY last_active DESC
-                    """)
+                    """, ((datetime.now() - timedelta(days=30)).isoformat(),))
                 else:
-                    cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-                
-                users = []
-                for row in cursor.fetchall():
-                    users.append(User(
-                        user_id=row['user_id'],
-                        username=row['username'],
-                        first_name=row['first_name'],
-                        last_name=row['last_name'],
-                        created_at=datetime.fromisoformat(row['created_at']),
-                        last_active=datetime.fromisoformat(row['last_active']),
-                        is_admin=bool(row['is_admin'])
-                    ))
+                    cursor.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY created_at DESC")
                 
-                return users
+                return cursor.fetchall()
         except Exception as e:
             logger.error(f"Ошибка при получении всех пользователей: {e}")
             return []
     
-    def get_users_count(self) -> int:
-        """Возвращает количество пользователей"""
+    def get_user_ids_chunk(
+        self,
+        after_user_id: int = 0,
+        limit: int = 1000,
+        active_days: Optional[int] = None,
+        exclude_blocked: bool = True
+    ) -> List[int]:
+        """
+        Возвращает до limit ID пользователей с user_id > after_user_id
+        Постраничная выборка по первичному ключу (keyset), без OFFSET
+        """
+        conditions = ["user_id > ?"]
+        params: List[Any] = [after_user_id]
+        
+        if active_days is not None:
+            conditions.append("last_active > ?")
+            params.append((datetime.now() - timedelta(days=active_days)).isoformat())
+        if exclude_blocked:
+            conditions.append("NOT is_blocked")
+        params.append(limit)
+        
         try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) as count FROM users")
-                return cursor.fetchone()['count']
-        except:
-            return 0
+                cursor = conn.execute(f"""
+                    SELECT user_id FROM users
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY user_id
+                    LIMIT ?
+                """, params)
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при выборке пользователей после {after_user_id}: {e}")
+            return []
+    
+    def iter_user_ids(
+        self,
+        chunk_size: int = 1000,
+        active_days: Optional[int] = None,
+        exclude_blocked: bool = True
+    ) -> Iterator[List[int]]:
+        """
+        Генератор ID пользователей пачками по chunk_size
+        Память не зависит от общего числа пользователей
+        """
+        self.flush_users()
+        after_user_id = 0
+        while True:
+            chunk = self.get_user_ids_chunk(after_user_id, chunk_size, active_days, exclude_blocked)
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            after_user_id = chunk[-1]
+    
+    def mark_user_blocked(self, user_id: int, blocked: bool = True) -> bool:
+        """Отмечает, что пользователь заблокировал бота (или разблокировал)"""
+        self.flush_users()
+        try:
+            with self._get_connection() as conn:
+                conn.execute(
+                    "UPDATE users SET is_blocked = ? WHERE user_id = ?",
+                    (blocked, user_id)
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении статуса блокировки {user_id}: {e}")
+            return False
+    
+    def get_users_count(self) -> int:
+        """Возвращает количество пользователей (из множества известных ID, без запроса)"""
+        with self._users_lock:
+            return len(self._known_users)
     
     # ========== МЕТОДЫ ДЛЯ ТУРНИРОВ ==========
+    # Турниры передаются словарями в том же формате, что и JSON турнира:
+    # {"id", "name", "date", "location", "fights": [...], "status", "bets_open", "has_odds", "_meta"}
     
-    # def save_tournament(self, tournament: Tournament) -> bool:
-    #     """Сохраняет турнир в базу"""
-    #     try:
-    #         with self._get_connection() as conn:
-    #             cursor = conn.cursor()
-                
-    #             # Конвертируем бои в JSON
-    #             fights_json = json.dumps(tournament.fights, ensure_ascii=False)
+    @staticmethod
+    def _fight_to_row(tournament_id: str, fight_index: int, fight: Dict[str, Any]) -> tuple:
+        """Бой (словарь) -> строка таблицы fights"""
+        odds = fight.get("odds") or {}
+        extra = {key: value for key, value in fight.items() if key not in FIGHT_KEYS}
+        return (
+            tournament_id, fight_index,
+            fight.get("fighter1", "Боец 1"), fight.get("fighter2", "Боец 2"),
+            fight.get("type"), fight.get("order"),
+            odds.get("fighter1"), odds.get("fighter2"),
+            fight.get("winner"), fight.get("status"),
+            json.dumps(extra, ensure_ascii=False) if extra else None
+        )
+    
+    @staticmethod
+    def _fight_from_row(row: tuple) -> Dict[str, Any]:
+        """Строка fights (без tournament_id, fight_index) -> бой (словарь)"""
+        fighter1, fighter2, card_type, order, odds1, odds2, winner, status, extra = row
+        fight = {"fighter1": fighter1, "fighter2": fighter2, "type": card_type, "order": order}
+        if odds1 is not None or odds2 is not None:
+            fight["odds"] = {"fighter1": odds1, "fighter2": odds2}
+        if winner is not None:
+            fight["winner"] = winner
+        if status is not None:
+            fight["status"] = status
+        if extra:
+            fight.update(json.loads(extra))
+        return fight
+    
+    @staticmethod
+    def _set_clause(columns: Dict[str, Any], extra: Dict[str, Any]) -> str:
+        """SET для частичного UPDATE: колонки + слияние прочих полей в JSON extra"""
+        assignments = [f"{column} = ?" for column in columns]
+        if extra:
+            assignments.append("extra = json_patch(COALESCE(extra, '{}'), ?)")
+        return ", ".join(assignments)
+    
+    @staticmethod
+    def _extra_params(extra: Dict[str, Any]) -> tuple:
+        return (json.dumps(extra, ensure_ascii=False),) if extra else ()
+    
+    def save_tournament(self, tournament: Dict[str, Any]) -> bool:
+        """Сохраняет турнир и весь его кард (заменяя прежний) одной транзакцией"""
+        tournament_id = str(tournament["id"])
+        meta = tournament.get("_meta") or {}
+        now = datetime.now().isoformat()
+        extra = {key: value for key, value in tournament.items() if key not in TOURNAMENT_KEYS}
+        try:
+            with self._get_connection() as conn:
+                conn.execute("""
+                    INSERT INTO tournaments 
+                    (tournament_id, name, date, location, status, bets_open, has_odds,
+                     selected_at, updated_at, extra)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tournament_id) DO UPDATE SET
+                        name = excluded.name,
+                        date = excluded.date,
+                        location = excluded.location,
+                        status = excluded.status,
+                        bets_open = excluded.bets_open,
+                        has_odds = excluded.has_odds,
+                        selected_at = excluded.selected_at,
+                        updated_at = excluded.updated_at,
+                        extra = excluded.extra
+                """, (
+                    tournament_id, tournament.get("name", "Неизвестный турнир"),
+                    tournament.get("date"), tournament.get("location"),
+                    tournament.get("status", "active"), bool(tournament.get("bets_open", True)),
+                    bool(tournament.get("has_odds", False)),
+                    meta.get("selected_at", now), meta.get("updated_at", now),
+                    json.dumps(extra, ensure_ascii=False) if extra else None
+                ))
+                conn.execute("DELETE FROM fights WHERE tournament_id = ?", (tournament_id,))
+                conn.executemany(
+                    "INSERT INTO fights VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        self._fight_to_row(tournament_id, fight_index, fight)
+                        for fight_index, fight in enumerate(tournament.get("fights", []))
+                    ]
+                )
+            logger.info(f"Турнир сохранён: {tournament_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении турнира {tournament_id}: {e}")
+            return False
+    
+    @staticmethod
+    def _tournament_from_row(row: tuple, fights: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Строка tournaments + бои -> турнир (словарь)"""
+        (tournament_id, name, date, location, status, bets_open, has_odds,
+         selected_at, updated_at, extra) = row
+        tournament = {
+            "id": tournament_id,
+            "name": name,
+            "date": date,
+            "location": location,
+            "fights": fights,
+            "status": status,
+            "bets_open": bool(bets_open),
+            "has_odds": bool(has_odds),
+            "_meta": {
+                "selected_at": selected_at,
+                "updated_at": updated_at,
+                "active": status == "active"
+            }
+        }
+        if extra:
+            tournament.update(json.loads(extra))
+        return tournament
+    
+    def get_tournament(self, tournament_id: str) -> Optional[Dict[str, Any]]:
+        """Получает турнир вместе с кардом"""
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(f"""
+                    SELECT {TOURNAMENT_COLUMNS} FROM tournaments WHERE tournament_id = ?
+                """, (str(tournament_id),)).fetchone()
+                if not row:
+                    return None
                 
-    #             cursor.execute("""
-    #                 INSERT OR REPLACE INTO tournaments 
-    #                 (tournament_id, name, date, location, fights, status, bets_open, created_at)
-    #                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    #             """, (
-    #                 tournament.tournament_id, tournament.name, tournament.date,
-    #                 tournament.location, fights_json, tournament.status,
-    #                 tournament.bets_open, tournament.created_at.isoformat()
-    #             ))
+                fights = [
+                    self._fight_from_row(tuple(fight_row))
+                    for fight_row in conn.execute(f"""
+                        SELECT {FIGHT_COLUMNS} FROM fights
+                        WHERE tournament_id = ?
+                        ORDER BY fight_index
+                    """, (row[0],))
+                ]
+            return self._tournament_from_row(tuple(row), fights)
+        except Exception as e:
+            logger.error(f"Ошибка при получении турнира {tournament_id}: {e}")
+            return None
+    
+    def get_active_tournaments(self) -> List[Dict[str, Any]]:
+        """
+        Все активные турниры (последний выбранный - первым)
+        Два запроса: турниры по индексу статуса и все их бои одним проходом
+        """
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(f"""
+                    SELECT {TOURNAMENT_COLUMNS} FROM tournaments
+                    WHERE status = 'active'
+                    ORDER BY selected_at DESC
+                """).fetchall()
+                if not rows:
+                    return []
                 
-    #             conn.commit()
-    #             logger.info(f"Турнир сохранён: {tournament.tournament_id}")
-    #             return True
-    #     except Exception as e:
-    #         logger.error(f"Ошибка при сохранении турнира {tournament.tournament_id}: {e}")
-    #         return False
-    
-    # def get_active_tournament(self) -> Optional[Tournament]:
-    #     """Получает активный турнир"""
-    #     try:
-    #         with self._get_connection() as conn:
-    #             cursor = conn.cursor()
-    #             cursor.execute(
-    #                 "SELECT * FROM tournaments WHERE status = 'active' ORDER BY created_at DESC LIMIT 1"
-    #             )
-    #             row = cursor.fetchone()
+                fights: Dict[str, List[Dict[str, Any]]] = {row[0]: [] for row in rows}
+                placeholders = ", ".join("?" * len(fights))
+                for fight_row in conn.execute(f"""
+                    SELECT tournament_id, {FIGHT_COLUMNS} FROM fights
+                    WHERE tournament_id IN ({placeholders})
+                    ORDER BY tournament_id, fight_index
+                """, tuple(fights)):
+                    fights[fight_row[0]].append(self._fight_from_row(tuple(fight_row)[1:]))
+            return [self._tournament_from_row(tuple(row), fights[row[0]]) for row in rows]
+        except Exception as e:
+            logger.error(f"Ошибка при получении активных турниров: {e}")
+            return []
+    
+    def get_tournament_ids(self, tournament_ids: List[str]) -> set:
+        """
+        Какие из переданных турниров уже есть в базе (в любом статусе)
+        При ошибке все id считаются известными: повторный выбор турнира
+        заменил бы его кард вместе с результатами
+        """
+        tournament_ids = [str(tournament_id) for tournament_id in tournament_ids]
+        if not tournament_ids:
+            return set()
+        try:
+            with self._get_connection() as conn:
+                placeholders = ", ".join("?" * len(tournament_ids))
+                return {
+                    row[0] for row in conn.execute(f"""
+                        SELECT tournament_id FROM tournaments
+                        WHERE tournament_id IN ({placeholders})
+                    """, tournament_ids)
+                }
+        except Exception as e:
+            logger.error(f"Ошибка при проверке известных турниров: {e}")
+            return set(tournament_ids)
+    
+    def get_active_tournament(self) -> Optional[Dict[str, Any]]:
+        """Получает последний выбранный активный турнир (поиск по индексу статуса)"""
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT tournament_id FROM tournaments
+                    WHERE status = 'active'
+                    ORDER BY selected_at DESC
+                    LIMIT 1
+                """).fetchone()
+        except Exception as e:
+            logger.error(f"Ошибка при получении активного турнира: {e}")
+            return None
+        return self.get_tournament(row[0]) if row else None
+    
+    def update_tournament(
+        self,
+        tournament_id: str,
+        fight_updates: Optional[Dict[int, Dict[str, Any]]] = None,
+        **fields: Any
+    ) -> bool:
+        """
+        Частичное обновление турнира: меняются только переданные поля и бои
+        fight_updates - {индекс_боя: {поле: значение}}, fields - поля турнира
+        """
+        fight_updates = fight_updates or {}
+        try:
+            with self._get_connection() as conn:
+                columns = {"updated_at": datetime.now().isoformat()}
+                extra = {}
+                for key, value in fields.items():
+                    if key in TOURNAMENT_UPDATABLE:
+                        columns[TOURNAMENT_UPDATABLE[key]] = value
+                    elif key not in TOURNAMENT_KEYS:
+                        extra[key] = value
+                cursor = conn.execute(
+                    f"UPDATE tournaments SET {self._set_clause(columns, extra)} "
+                    f"WHERE tournament_id = ?",
+                    (*columns.values(), *self._extra_params(extra), str(tournament_id))
+                )
+                if cursor.rowcount == 0:
+                    logger.warning(f"Турнир {tournament_id} не найден")
+                    return False
                 
-    #             if row:
-    #                 fights = json.loads(row['fights']) if row['fights'] else []
-    #                 return Tournament(
-    #                     tournament_id=row['tournament_id'],
-    #                     name=row['name'],
-    #                     date=row['date'],
-    #                     location=row['location'],
-    #                     fights=fights,
-    #                     status=row['status'],
-    #                     bets_open=bool(row['bets_open']),
-    #                     created_at=datetime.fromisoformat(row['created_at'])
-    #                 )
-    #             return None
-    #     except Exception as e:
-    #         logger.error(f"Ошибка при получении активного турнира: {e}")
-    #         return None
+                for fight_index, changes in fight_updates.items():
+                    fight_columns = {}
+                    extra = {}
+                    for key, value in changes.items():
+                        if key == "odds":
+                            fight_columns["fighter1_odds"] = value.get("fighter1")
+                            fight_columns["fighter2_odds"] = value.get("fighter2")
+                        elif key in FIGHT_UPDATABLE:
+                            fight_columns[FIGHT_UPDATABLE[key]] = value
+                        else:
+                            extra[key] = value
+                    if not fight_columns and not extra:
+                        continue
+                    conn.execute(
+                        f"UPDATE fights SET {self._set_clause(fight_columns, extra)} "
+                        f"WHERE tournament_id = ? AND fight_index = ?",
+                        (*fight_columns.values(), *self._extra_params(extra),
+                         str(tournament_id), fight_index)
+                    )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении турнира {tournament_id}: {e}")
+            return False
+    
+    def add_fights(self, tournament_id: str, fights: Dict[int, Dict[str, Any]]) -> bool:
+        """
+        Добавляет бои в кард турнира: {индекс_боя: бой}
+        Индексы существующих боёв (и ставок на них) не меняются
+        """
+        try:
+            with self._get_connection() as conn:
+                conn.executemany(
+                    "INSERT INTO fights VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        self._fight_to_row(str(tournament_id), fight_index, fight)
+                        for fight_index, fight in fights.items()
+                    ]
+                )
+                conn.execute(
+                    "UPDATE tournaments SET updated_at = ? WHERE tournament_id = ?",
+                    (datetime.now().isoformat(), str(tournament_id))
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении боёв в турнир {tournament_id}: {e}")
+            return False
     
     # ========== МЕТОДЫ ДЛЯ СТАВОК ==========
-    # (пока заглушки, добавим позже)
+    
+    # Upsert ставки: повторный выбор на тот же бой заменяет прежний.
+    # Рассчитанный бой (есть в fight_results) и рассчитанная ставка (payout)
+    # не меняются: новая ставка не вставляется, старая не перезаписывается
+    _UPSERT_BET_SQL = """
+        INSERT INTO bets 
+        (user_id, tournament_id, fight_index, fighter_choice, amount, created_at)
+        SELECT ?1, ?2, ?3, ?4, ?5, ?6
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fight_results WHERE tournament_id = ?2 AND fight_index = ?3
+        )
+        ON CONFLICT(user_id, tournament_id, fight_index) DO UPDATE SET
+            fighter_choice = excluded.fighter_choice,
+            amount = excluded.amount,
+            created_at = excluded.created_at
+        WHERE bets.payout IS NULL
+    """
+    
+    @staticmethod
+    def _bet_params(bet: Bet) -> tuple:
+        """Параметры ставки для _UPSERT_BET_SQL"""
+        return (
+            bet.user_id, bet.tournament_id, bet.fight_index,
+            bet.fighter_choice, bet.amount, bet.created_at.isoformat()
+        )
     
     def add_bet(self, bet: Bet) -> bool:
-        """Добавляет ставку"""
-        # TODO: реализовать позже
-        return True
+        """
+        Добавляет ставку или меняет выбор пользователя на этот бой
+        False - ошибка или бой уже рассчитан (ставка не изменилась)
+        """
+        try:
+            with self._get_connection() as conn:
+                written = conn.execute(self._UPSERT_BET_SQL, self._bet_params(bet)).rowcount
+            if not written:
+                logger.warning(
+                    f"Ставка пользователя {bet.user_id} не принята: бой {bet.fight_index} "
+                    f"турнира {bet.tournament_id} уже рассчитан"
+                )
+            return bool(written)
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении ставки пользователя {bet.user_id}: {e}")
+            return False
+    
+    def add_bets(self, bets: List[Bet]) -> int:
+        """
+        Добавляет пачку ставок одной транзакцией
+        Возвращает количество записанных ставок (0 при ошибке),
+        ставки на уже рассчитанные бои не записываются и не считаются
+        """
+        if not bets:
+            return 0
+        try:
+            with self._get_connection() as conn:
+                return conn.executemany(self._UPSERT_BET_SQL, [self._bet_params(bet) for bet in bets]).rowcount
+        except Exception as e:
+            logger.error(f"Ошибка при сохранении пачки ставок ({len(bets)} шт.): {e}")
+            return 0
     
     def get_user_bets(self, user_id: int, tournament_id: str) -> List[Bet]:
         """Получает ставки пользователя на турнир"""
-        # TODO: реализовать позже
-        return []
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = bet_row_factory
+                cursor.execute(f"""
+                    SELECT {BET_COLUMNS} FROM bets
+                    WHERE user_id = ? AND tournament_id = ?
+                    ORDER BY fight_index
+                """, (user_id, tournament_id))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка при получении ставок пользователя {user_id}: {e}")
+            return []
+    
+    def get_fight_bet_counts(self, tournament_id: str) -> Dict[int, Dict[str, int]]:
+        """
+        Считает ставки турнира по боям: {fight_index: {"fighter1": N, "fighter2": M}}
+        Выполняется только по покрывающему индексу
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute("""
+                    SELECT fight_index, fighter_choice, COUNT(*) AS count
+                    FROM bets
+                    WHERE tournament_id = ?
+                    GROUP BY fight_index, fighter_choice
+                """, (tournament_id,))
+                
+                counts: Dict[int, Dict[str, int]] = {}
+                for row in cursor:
+                    counts.setdefault(row['fight_index'], {})[row['fighter_choice']] = row['count']
+                return counts
+        except Exception as e:
+            logger.error(f"Ошибка при подсчёте ставок турнира {tournament_id}: {e}")
+            return {}
+    
+    def get_tournament_totals(self, tournament_id: str) -> Dict[str, Any]:
+        """
+        Итоги ставок турнира для архива:
+        {"bets": ставок, "users": участников, "staked": сумма ставок, "payout": выплачено}
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT COUNT(*), COUNT(DISTINCT user_id),
+                           COALESCE(SUM(amount), 0), COALESCE(SUM(payout), 0)
+                    FROM bets
+                    WHERE tournament_id = ?
+                """, (tournament_id,)).fetchone()
+            return {"bets": row[0], "users": row[1], "staked": row[2], "payout": round(row[3], 2)}
+        except Exception as e:
+            logger.error(f"Ошибка при подсчёте итогов турнира {tournament_id}: {e}")
+            return {"bets": 0, "users": 0, "staked": 0, "payout": 0.0}
+    
+    # ========== РАСЧЁТ СТАВОК ==========
+    
+    def settle_fights(
+        self,
+        tournament_id: str,
+        results: Dict[int, Tuple[str, float, float]],
+        chunk_size: int = 5000
+    ) -> Dict[str, Any]:
+        """
+        Рассчитывает ставки турнира по итогам боёв
+        results: {fight_index: (winner, fighter1_odds, fighter2_odds)},
+                 winner - "fighter1", "fighter2" или "draw" (ничья/отмена - возврат ставки)
+        
+        Каждая пачка ставок - отдельная транзакция: выплаты пачки и изменения
+        таблицы лидеров по ней, так что соединение не занято на весь расчёт.
+        Пересчитываются только ставки без выплаты (payout IS NULL), бой отмечается
+        в fight_results после всех своих ставок. Поэтому повторный запуск после
+        сбоя безопасен: уже рассчитанные бои и ставки пропускаются и ничего не
+        выплачивается дважды.
+        """
+        report = {"fights": 0, "skipped": 0, "bets": 0, "won": 0, "payout": 0.0}
+        
+        with self._get_connection() as conn:
+            settled = {
+                row[0] for row in conn.execute(
+                    "SELECT fight_index FROM fight_results WHERE tournament_id = ?",
+                    (tournament_id,)
+                )
+            }
+        pending = {i: result for i, result in results.items() if i not in settled}
+        report["skipped"] = len(results) - len(pending)
+        if not pending:
+            return report
+        
+        # Таблица выплат: (бой, выбор) -> множитель ставки.
+        # None - ничья/отмена: ставка возвращается и не идёт в статистику
+        rates: Dict[Tuple[int, str], Optional[float]] = {}
+        for fight_index, (winner, odds1, odds2) in pending.items():
+            if winner == "draw":
+                rates[(fight_index, "fighter1")] = None
+                rates[(fight_index, "fighter2")] = None
+            else:
+                rates[(fight_index, "fighter1")] = odds1 if winner == "fighter1" else 0.0
+                rates[(fight_index, "fighter2")] = odds2 if winner == "fighter2" else 0.0
+        
+        last_key = (-1, -1)
+        
+        # Ставки читаются пачками по индексу (tournament_id, fight_index, user_id, ...)
+        while True:
+            with self._get_connection() as conn:
+                chunk = conn.execute("""
+                    SELECT bet_id, fight_index, user_id, fighter_choice, amount, payout
+                    FROM bets
+                    WHERE tournament_id = ? AND (fight_index, user_id) > (?, ?)
+                    ORDER BY fight_index, user_id
+                    LIMIT ?
+                """, (tournament_id, *last_key, chunk_size)).fetchall()
+                if not chunk:
+                    break
+                last_key = (chunk[-1][1], chunk[-1][2])
+                
+                # user_id -> [points, wins, bets, staked, returned]
+                deltas: Dict[int, List[float]] = {}
+                updates = []
+                for bet_id, fight_index, user_id, choice, amount, paid in chunk:
+                    key = (fight_index, choice)
+                    if key not in rates or paid is not None:
+                        continue  # бой не рассчитывается в этом запуске или ставка уже рассчитана
+                    
+                    rate = rates[key]
+                    if rate is None:
+                        updates.append((float(amount), bet_id))
+                        continue
+                    
+                    payout = amount * rate
+                    updates.append((payout, bet_id))
+                    
+                    delta = deltas.setdefault(user_id, [0.0, 0, 0, 0.0, 0.0])
+                    delta[0] += payout
+                    delta[1] += 1 if payout else 0
+                    delta[2] += 1
+                    delta[3] += amount
+                    delta[4] += payout
+                    
+                    report["won"] += 1 if payout else 0
+                    report["payout"] += payout
+                
+                conn.executemany("UPDATE bets SET payout = ? WHERE bet_id = ?", updates)
+                self.apply_score_deltas({user_id: tuple(delta) for user_id, delta in deltas.items()}, conn)
+                report["bets"] += len(updates)
+            
+            if len(chunk) < chunk_size:
+                break
+        
+        with self._get_connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO fight_results (tournament_id, fight_index, winner) VALUES (?, ?, ?)",
+                [(tournament_id, i, winner) for i, (winner, _, _) in pending.items()]
+            )
+        report["fights"] = len(pending)
+        
+        logger.info(
+            f"Турнир {tournament_id} рассчитан: боёв {report['fights']}, "
+            f"ставок {report['bets']}, выиграло {report['won']}"
+        )
+        return report
+    
+    def has_unsettled_bets(self, tournament_id: str) -> bool:
+        """
+        Есть ли ставки на бои турнира, ещё не отмеченные в fight_results
+        Проверка по боям карда (их единицы), а не по всем ставкам турнира.
+        При ошибке возвращает True - турнир со ставками не должен закрыться по сроку
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM fights f
+                        WHERE f.tournament_id = ?
+                          AND NOT EXISTS (
+                              SELECT 1 FROM fight_results r
+                              WHERE r.tournament_id = f.tournament_id AND r.fight_index = f.fight_index
+                          )
+                          AND EXISTS (
+                              SELECT 1 FROM bets b
+                              WHERE b.tournament_id = f.tournament_id AND b.fight_index = f.fight_index
+                          )
+                    )
+                """, (str(tournament_id),)).fetchone()
+            return bool(row[0])
+        except Exception as e:
+            logger.error(f"Ошибка при проверке нерассчитанных ставок турнира {tournament_id}: {e}")
+            return True
+    
+    # ========== ТАБЛИЦА ЛИДЕРОВ ==========
+    
+    def apply_score_deltas(
+        self,
+        deltas: Dict[int, Tuple[float, int, int, float, float]],
+        conn: Optional[sqlite3.Connection] = None
+    ) -> bool:
+        """
+        Прибавляет изменения к таблице лидеров
+        deltas: {user_id: (points, wins, bets, staked, returned)}
+        Если передан conn - выполняется внутри уже открытой транзакции вызывающего кода
+        """
+        if not deltas:
+            return True
+        
+        rows = [(user_id, *delta) for user_id, delta in deltas.items()]
+        sql = """
+            INSERT INTO user_scores (user_id, points, wins, bets, staked, returned, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id) DO UPDATE SET
+                points = points + excluded.points,
+                wins = wins + excluded.wins,
+                bets = bets + excluded.bets,
+                staked = staked + excluded.staked,
+                returned = returned + excluded.returned,
+                updated_at = excluded.updated_at
+        """
+        if conn is not None:
+            conn.executemany(sql, rows)
+            return True
+        
+        try:
+            with self._get_connection() as conn:
+                conn.executemany(sql, rows)
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении таблицы лидеров: {e}")
+            return False
+    
+    def get_top_scores(self, limit: int = 10) -> List[UserScore]:
+        """
+        Возвращает первые limit строк таблицы лидеров
+        Порядок: очки, затем угаданные бои, при полном равенстве - user_id
+        (тот же порядок, что в get_user_rank)
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = score_row_factory
+                cursor.execute(f"""
+                    SELECT {SCORE_COLUMNS}
+                    FROM user_scores s
+                    LEFT JOIN users u ON u.user_id = s.user_id
+                    ORDER BY s.points DESC, s.wins DESC, s.user_id
+                    LIMIT ?
+                """, (limit,))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Ошибка при получении таблицы лидеров: {e}")
+            return []
+    
+    def get_user_score(self, user_id: int) -> Optional[UserScore]:
+        """Возвращает результаты пользователя (None если ставок ещё не было)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = score_row_factory
+                cursor.execute(f"""
+                    SELECT {SCORE_COLUMNS}
+                    FROM user_scores s
+                    LEFT JOIN users u ON u.user_id = s.user_id
+                    WHERE s.user_id = ?
+                """, (user_id,))
+                return cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Ошибка при получении результатов пользователя {user_id}: {e}")
+            return None
+    
+    def get_user_rank(self, user_id: int) -> Optional[int]:
+        """
+        Место пользователя в таблице лидеров - в том же порядке, что get_top_scores
+        (очки, угаданные бои, user_id), поэтому совпадает с местом в топе
+        
+        1 + число строк выше пользователя: три диапазона по индексу
+        idx_user_scores_rank (в нём неявно есть user_id). Это не одно чтение -
+        стоимость растёт с местом (для последнего из 1M строк - десятки мс,
+        в потоке БД, не в event loop)
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT 1
+                        + (SELECT COUNT(*) FROM user_scores
+                           WHERE points > s.points)
+                        + (SELECT COUNT(*) FROM user_scores
+                           WHERE points = s.points AND wins > s.wins)
+                        + (SELECT COUNT(*) FROM user_scores
+                           WHERE points = s.points AND wins = s.wins AND user_id < s.user_id)
+                    FROM user_scores s
+                    WHERE s.user_id = ?
+                """, (user_id,)).fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Ошибка при получении места пользователя {user_id}: {e}")
+            return None
 
 
-# Глобальный экземпляр базы данных
-db = Database()
\ No newline at end of file
+def __getattr__(name: str):
+    """
+    Глобальный экземпляр базы данных создаётся при первом обращении
+    (from db.database import db), а не при импорте модуля: импорт одного
+    класса Database (бенчмарки, скрипты) не открывает db/ufc_bot.db
+    """
+    if name == "db":
+        global db
+        db = Database()
+        return db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
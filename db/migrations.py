@@ -0,0 +1,232 @@
+"""
+Версионные миграции схемы базы данных
+
+Каждая миграция выполняется один раз в своей транзакции,
+номер применённой версии записывается в таблицу schema_version.
+Новые изменения схемы добавляются ТОЛЬКО в конец списка MIGRATIONS.
+"""
+import sqlite3
+import logging
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str):
+    """Добавляет колонку, если её ещё нет (старые базы могли получить её без миграций)"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migration_1_base_tables(conn: sqlite3.Connection):
+    """Исходные таблицы (на рабочих базах уже существуют)"""
+    # Таблица пользователей
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_admin BOOLEAN DEFAULT FALSE
+        )
+    """)
+
+    # Таблица турниров
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tournaments (
+            tournament_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            date TEXT,
+            location TEXT,
+            fights TEXT,  -- JSON список боёв
+            status TEXT DEFAULT 'active',
+            bets_open BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Таблица ставок
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bets (
+            bet_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            tournament_id TEXT NOT NULL,
+            fight_index INTEGER NOT NULL,
+            fighter_choice TEXT NOT NULL,
+            amount INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (user_id),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (tournament_id)
+        )
+    """)
+
+
+def _migration_2_bets_indexes(conn: sqlite3.Connection):
+    """Уникальная ставка на бой и покрывающий индекс по турниру/бою"""
+    # Одна ставка пользователя на бой: ограничение + цель для upsert
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_bets_user_fight
+        ON bets (user_id, tournament_id, fight_index)
+    """)
+
+    # Покрывающий индекс для выборок по турниру/бою (расчёт, статистика):
+    # все нужные колонки читаются прямо из индекса, без обращения к таблице
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_bets_tournament_fight
+        ON bets (tournament_id, fight_index, user_id, fighter_choice, amount)
+    """)
+
+
+def _migration_3_users_blocked(conn: sqlite3.Connection):
+    """Флаг пользователей, заблокировавших бота (исключаются из рассылок)"""
+    _add_column(conn, "users", "is_blocked", "BOOLEAN DEFAULT FALSE")
+
+
+def _migration_4_users_activity_indexes(conn: sqlite3.Connection):
+    """Индексы для фильтров и сортировок по активности пользователей"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_last_active ON users (last_active)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at)")
+
+
+def _migration_5_user_scores(conn: sqlite3.Connection):
+    """Материализованная таблица лидеров, обновляется при расчёте боёв"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_scores (
+            user_id INTEGER PRIMARY KEY,
+            points REAL NOT NULL DEFAULT 0,    -- сумма выигрышей (ставка * коэффициент)
+            wins INTEGER NOT NULL DEFAULT 0,   -- угаданные бои
+            bets INTEGER NOT NULL DEFAULT 0,   -- рассчитанные ставки
+            staked REAL NOT NULL DEFAULT 0,    -- сумма ставок
+            returned REAL NOT NULL DEFAULT 0,  -- сумма выплат
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Порядок таблицы лидеров: и "топ-10", и подсчёт места идут по этому индексу
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_scores_rank
+        ON user_scores (points DESC, wins DESC)
+    """)
+
+
+def _migration_6_settlement(conn: sqlite3.Connection):
+    """Выплаты по ставкам и отметки о рассчитанных боях"""
+    # NULL - ставка ещё не рассчитана
+    _add_column(conn, "bets", "payout", "REAL")
+
+    # Наличие строки = бой рассчитан, повторный расчёт его пропускает
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fight_results (
+            tournament_id TEXT NOT NULL,
+            fight_index INTEGER NOT NULL,
+            winner TEXT,  -- fighter1, fighter2 или draw (ничья/отмена - возврат)
+            settled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (tournament_id, fight_index)
+        )
+    """)
+
+
+def _migration_7_tournament_fights(conn: sqlite3.Connection):
+    """Турниры и бои хранятся в таблицах (JSON-файл остаётся только экспортом)"""
+    _add_column(conn, "tournaments", "has_odds", "BOOLEAN DEFAULT FALSE")
+    _add_column(conn, "tournaments", "selected_at", "TIMESTAMP")
+    _add_column(conn, "tournaments", "updated_at", "TIMESTAMP")
+    _add_column(conn, "tournaments", "extra", "TEXT")  # JSON прочих полей турнира
+
+    # "Активный турнир" - поиск по индексу вместо чтения файла
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tournaments_status
+        ON tournaments (status, selected_at)
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fights (
+            tournament_id TEXT NOT NULL,
+            fight_index INTEGER NOT NULL,  -- совпадает с bets.fight_index
+            fighter1 TEXT NOT NULL,
+            fighter2 TEXT NOT NULL,
+            card_type TEXT,                -- Главный / Предварительный
+            fight_order INTEGER,
+            fighter1_odds REAL,
+            fighter2_odds REAL,
+            winner TEXT,                   -- fighter1, fighter2, draw
+            status TEXT,                   -- NULL - по расписанию, cancelled - бой снят
+            extra TEXT,                    -- JSON прочих полей боя
+            PRIMARY KEY (tournament_id, fight_index),
+            FOREIGN KEY (tournament_id) REFERENCES tournaments (tournament_id)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migration_8_users_local_timestamps(conn: sqlite3.Connection):
+    """
+    Даты пользователей в одном формате: код пишет локальное время через
+    datetime.isoformat() ("YYYY-MM-DDTHH:MM:SS"), а старые строки хранят
+    CURRENT_TIMESTAMP - UTC через пробел. Строки сравниваются как текст
+    (фильтр активности), поэтому старые значения переводятся в новый формат
+    """
+    for column in ("created_at", "last_active"):
+        conn.execute(f"""
+            UPDATE users
+            SET {column} = strftime('%Y-%m-%dT%H:%M:%S', {column}, 'localtime')
+            WHERE {column} LIKE '____-__-__ __:__:__%'
+        """)
+
+
+# (версия, описание, функция) - строго по возрастанию версии
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "Базовые таблицы users, tournaments, bets", _migration_1_base_tables),
+    (2, "Индексы таблицы bets", _migration_2_bets_indexes),
+    (3, "Колонка users.is_blocked", _migration_3_users_blocked),
+    (4, "Индексы users.last_active и users.created_at", _migration_4_users_activity_indexes),
+    (5, "Таблица лидеров user_scores", _migration_5_user_scores),
+    (6, "Расчёт ставок: bets.payout и fight_results", _migration_6_settlement),
+    (7, "Таблица fights и индекс tournaments.status", _migration_7_tournament_fights),
+    (8, "Локальное время ISO в users.created_at и users.last_active", _migration_8_users_local_timestamps),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Возвращает номер последней применённой миграции (0 для пустой базы)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Применяет все ещё не применённые миграции по порядку
+    Данные не удаляются: миграции только добавляют таблицы, колонки и индексы
+    Возвращает итоговую версию схемы
+    """
+    current_version = get_schema_version(conn)
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        try:
+            conn.execute("BEGIN")
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            logger.error(f"Ошибка миграции {version}: {description}")
+            raise
+
+        current_version = version
+        logger.info(f"Применена миграция {version}: {description}")
+
+    return current_version
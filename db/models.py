@@ -2,64 +2,78 @@
 Модели данных для базы данных бота
 """
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
+
+
+class LazyTimestamp:
+    """
+    Дескриптор для полей-дат: хранит строку ISO из БД как есть
+    и превращает её в datetime только при первом обращении
+    """
+    
+    def __set_name__(self, owner, name):
+        self.slot = f"_{name}"
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.slot)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+            setattr(obj, self.slot, value)
+        return value
+    
+    def __set__(self, obj, value):
+        setattr(obj, self.slot, value)
 
 
 class User:
     """Модель пользователя"""
     
+    __slots__ = (
+        "user_id", "username", "first_name", "last_name",
+        "_created_at", "_last_active", "is_admin"
+    )
+    
+    created_at = LazyTimestamp()
+    last_active = LazyTimestamp()
+    
     def __init__(
         self,
         user_id: int,
         username: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-        created_at: Optional[datetime] = None,
-        last_active: Optional[datetime] = None,
+        created_at: Optional[Union[datetime, str]] = None,
+        last_active: Optional[Union[datetime, str]] = None,
         is_admin: bool = False
     ):
         self.user_id = user_id
         self.username = username
         self.first_name = first_name
         self.last_name = last_name
-        self.created_at = created_at or datetime.now()
-        self.last_active = last_active or datetime.now()
-        self.is_admin = is_admin
+        if created_at is None or last_active is None:
+            now = datetime.now()
+            created_at = created_at or now
+            last_active = last_active or now
+        self.created_at = created_at
+        self.last_active = last_active
+        self.is_admin = bool(is_admin)
     
     def __repr__(self):
         return f"User({self.user_id}, @{self.username}, {self.first_name})"
 
 
-class Tournament:
-    """Модель турнира (активного)"""
-    
-    def __init__(
-        self,
-        tournament_id: str,
-        name: str,
-        date: str,
-        location: str,
-        fights: list,
-        status: str = "active",
-        bets_open: bool = True,
-        created_at: Optional[datetime] = None
-    ):
-        self.tournament_id = tournament_id
-        self.name = name
-        self.date = date
-        self.location = location
-        self.fights = fights  # Список боёв в JSON формате
-        self.status = status  # active, finished, cancelled
-        self.bets_open = bets_open
-        self.created_at = created_at or datetime.now()
-    
-    def __repr__(self):
-        return f"Tournament({self.tournament_id}, {self.name})"
-
-
 class Bet:
     """Модель ставки пользователя"""
     
+    __slots__ = (
+        "bet_id", "user_id", "tournament_id", "fight_index",
+        "fighter_choice", "amount", "_created_at"
+    )
+    
+    created_at = LazyTimestamp()
+    
     def __init__(
         self,
         bet_id: int,
@@ -68,7 +82,7 @@ class Bet:
         fight_index: int,  # Индекс боя в списке fights
         fighter_choice: str,  # Выбранный боец (fighter1 или fighter2)
         amount: int = 1,  # Количество очков/ставка
-        created_at: Optional[datetime] = None
+        created_at: Optional[Union[datetime, str]] = None
     ):
         self.bet_id = bet_id
         self.user_id = user_id
@@ -79,4 +93,39 @@ class Bet:
         self.created_at = created_at or datetime.now()
     
     def __repr__(self):
-        return f"Bet({self.bet_id}, user:{self.user_id}, fight:{self.fight_index})"
\ No newline at end of file
+        return f"Bet({self.bet_id}, user:{self.user_id}, fight:{self.fight_index})"
+
+
+
+class UserScore:
+    """Строка таблицы лидеров (накопленные результаты пользователя)"""
+    
+    __slots__ = ("user_id", "points", "wins", "bets", "staked", "returned", "name")
+    
+    def __init__(
+        self,
+        user_id: int,
+        points: float = 0.0,
+        wins: int = 0,
+        bets: int = 0,
+        staked: float = 0.0,
+        returned: float = 0.0,
+        name: Optional[str] = None  # Имя для отображения (из таблицы users)
+    ):
+        self.user_id = user_id
+        self.points = points
+        self.wins = wins
+        self.bets = bets
+        self.staked = staked
+        self.returned = returned
+        self.name = name
+    
+    @property
+    def roi(self) -> float:
+        """Доходность ставок в процентах"""
+        if not self.staked:
+            return 0.0
+        return (self.returned - self.staked) / self.staked * 100
+    
+    def __repr__(self):
+        return f"UserScore({self.user_id}, points:{self.points}, wins:{self.wins}/{self.bets})"
\ No newline at end of file
@@ -15,12 +15,19 @@ router = Router()
 @router.callback_query(lambda c: c.data.startswith("confirm_tournament_"))
 async def confirm_tournament_selection(callback: CallbackQuery):
     """
-    Сохраняет выбранный турнир как текущий
+    Добавляет выбранный турнир к активным
     """
     event_id = callback.data.replace("confirm_tournament_", "")
     
+    if storage.get_tournament(event_id) is not None:
+        await callback.answer("ℹ️ Этот турнир уже активен", show_alert=True)
+        return
+    if await storage.get_known_ids([event_id]):
+        await callback.answer("ℹ️ Этот турнир уже закрыт", show_alert=True)
+        return
+    
     # Получаем информацию о турнире
-    event = ufc_api.get_event_by_id(event_id)
+    event = await ufc_api.get_event_by_id(event_id)
     if not event:
         await callback.answer(
             "❌ Не удалось загрузить информацию о турнире",
@@ -29,25 +36,26 @@ async def confirm_tournament_selection(callback: CallbackQuery):
         return
     
     # Получаем бои турнира
-    fights = ufc_api.get_event_fights(event_id)
+    fights = await ufc_api.get_event_fights(event_id)
     
     # Подготавливаем данные для сохранения
     tournament_data = {
         "id": event_id,
-        "name": event["name"],
-        "date": event["date"],
-        "location": event["location"],
+        "name": event.name,
+        "date": event.date,
+        "timestamp": event.timestamp,  # Unix-время начала: от него считается срок турнира
+        "location": event.location,
         "fights": fights,
         "status": "active",  # active, finished, cancelled
         "bets_open": True,   # Приём ставок открыт
     }
     
-    # Сохраняем в JSON
-    if storage.save_current_tournament(tournament_data):
+    # Сохраняем в реестр активных турниров
+    if await storage.activate_tournament(tournament_data):
         # Показываем сообщение об успехе
         await callback.answer(
             f"✅ Турнир выбран!\n\n"
-            f"{event['name']}\n"
+            f"{event.name}\n"
             f"Теперь пользователи могут делать ставки на бои этого турнира.",
             show_alert=True
         )
@@ -90,8 +98,8 @@ async def manage_tournament(callback: CallbackQuery):
     """
     event_id = callback.data.replace("manage_tournament_", "")
     
-    tournament = storage.get_current_tournament()
-    if not tournament or tournament.get("id") != event_id:
+    tournament = storage.get_tournament(event_id)
+    if not tournament:
         await callback.answer(
             "❌ Турнир не найден или не активен",
             show_alert=True
@@ -8,7 +8,8 @@ from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKe
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from db.database import db
+from aiogram.exceptions import TelegramForbiddenError
+from db.async_database import async_db
 
 # Импорты для админ-панели
 from utils.json_storage import storage
@@ -17,6 +18,9 @@ from handlers.admin.panel import get_admin_menu, get_admin_message_text
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Рассылка идёт пользователям, активным за последние N дней
+ACTIVE_USERS_DAYS = 30
+
 # Глобальная переменная для bot (будет установлена из main.py)
 bot_instance: Bot = None
 
@@ -36,8 +40,7 @@ async def show_admin_panel(message: Message):
     """
     Показывает админ-панель с кнопками
     """
-    current_tournament = storage.get_current_tournament()
-    has_active_tournament = bool(current_tournament and current_tournament.get("status") == "active")
+    has_active_tournament = bool(storage.list_tournaments())
     
     await message.answer(
         get_admin_message_text(has_active_tournament),
@@ -299,27 +302,38 @@ async def announcement_confirm(callback: CallbackQuery, state: FSMContext):
     
     await callback.message.edit_text("🔄 Рассылка объявления...")
     
-    users = db.get_all_users()
-    total_users = len(users)
+    total_users = 0
     successful = 0
     failed = 0
+    blocked = 0
     
-    for user in users:
-        try:
-            if user.user_id == callback.from_user.id:
+    # Идём по пользователям пачками, не загружая всю базу в память
+    async for user_ids in async_db.iter_user_ids(active_days=ACTIVE_USERS_DAYS):
+        for user_id in user_ids:
+            total_users += 1
+            try:
+                if user_id == callback.from_user.id:
+                    successful += 1
+                    continue
+                
+                await bot_instance.copy_message(
+                    chat_id=user_id,
+                    from_chat_id=content_data['chat_id'],
+                    message_id=content_data['message_id']
+                )
                 successful += 1
-                continue
-            
-            await bot_instance.copy_message(
-                chat_id=user.user_id,
-                from_chat_id=content_data['chat_id'],
-                message_id=content_data['message_id']
-            )
-            successful += 1
-            
-        except Exception as e:
-            logger.error(f"Ошибка при отправке пользователю {user.user_id}: {e}")
-            failed += 1
+                
+            except TelegramForbiddenError:
+                # Пользователь заблокировал бота - больше не шлём ему рассылки
+                await async_db.mark_user_blocked(user_id)
+                blocked += 1
+                failed += 1
+            except Exception as e:
+                logger.error(f"Ошибка при отправке пользователю {user_id}: {e}")
+                failed += 1
+    
+    if blocked:
+        logger.info(f"Рассылка: {blocked} пользователей заблокировали бота")
     
     status_text = ""
     if successful == 0:
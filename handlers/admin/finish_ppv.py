@@ -2,22 +2,227 @@
 Обработчик кнопки "Завершить текущий PPV"
 """
 import logging
-from aiogram import Router
-from aiogram.types import CallbackQuery
+import re
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, Message, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.filters import StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from db.async_database import async_db
+from utils.json_storage import storage
+from handlers.admin.set_odds import format_fights_list, show_admin_panel
+from handlers.admin.panel import get_tournament_choice_menu
+from db.database import CANCELLED
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Коэффициент, если админ не ввёл коэффициенты на бой
+DEFAULT_ODDS = 1.0
+
+# Код результата во вводе админа -> победитель
+RESULT_CODES = {
+    "1": "fighter1",
+    "2": "fighter2",
+    "0": "draw",
+}
+
+
+# Состояния FSM для ввода результатов
+class FinishStates(StatesGroup):
+    waiting_for_results = State()  # Ждём результаты боёв
+
+
+def parse_results_text(results_text: str, fights_count: int) -> tuple[bool, str, list]:
+    """
+    Парсит текст с результатами боёв
+    Возвращает: (успех, сообщение_об_ошибке, список_победителей)
+    """
+    lines = results_text.strip().split('\n')
+    
+    if len(lines) != fights_count:
+        return False, f"❌ Нужно {fights_count} строк, а получили {len(lines)}", []
+    
+    winners = []
+    for i, line in enumerate(lines, 1):
+        match = re.match(r'^(\d+)\.?\s+([012])$', line.strip())
+        if not match:
+            return False, f"❌ Строка {i}: неправильный формат. Должно быть: 'номер. 1/2/0'", []
+        
+        line_num, code = match.groups()
+        if int(line_num) != i:
+            return False, f"❌ Строка {i}: неправильный номер. Должно быть: {i}.", []
+        
+        winners.append(RESULT_CODES[code])
+    
+    return True, "✅ Формат правильный", winners
+
+
+def build_fight_results(fights: list) -> dict:
+    """
+    Готовит данные для расчёта: {fight_index: (победитель, кф1, кф2)}
+    Бои без указанного победителя не рассчитываются, снятые с карда -
+    как ничья (ставки возвращаются), что бы ни ввёл админ
+    """
+    results = {}
+    for fight_index, fight in enumerate(fights):
+        winner = "draw" if fight.get("status") == CANCELLED else fight.get("winner")
+        if not winner:
+            continue
+        odds = fight.get("odds") or {}
+        results[fight_index] = (
+            winner,
+            odds.get("fighter1", DEFAULT_ODDS),
+            odds.get("fighter2", DEFAULT_ODDS)
+        )
+    return results
+
+
+@router.callback_query(lambda c: c.data == "admin_finish_ppv" or c.data.startswith("admin_finish_ppv_"))
+async def admin_finish_ppv_handler(callback: CallbackQuery, state: FSMContext):
+    """
+    Обработчик кнопки "Завершить PPV"
+    admin_finish_ppv_<id> - конкретный турнир, admin_finish_ppv - единственный
+    активный (если их несколько, предлагается выбрать)
+    """
+    logger.info(f"Администратор {callback.from_user.id} нажал 'Завершить PPV'")
+    
+    event_id = callback.data.replace("admin_finish_ppv", "").lstrip("_")
+    if event_id:
+        tournament = storage.get_tournament(event_id)
+    else:
+        tournaments = storage.list_tournaments()
+        if len(tournaments) > 1:
+            await callback.message.answer(
+                "🏁 Какой турнир завершить?",
+                reply_markup=get_tournament_choice_menu("admin_finish_ppv")
+            )
+            await callback.answer()
+            return
+        tournament = tournaments[0] if tournaments else None
+    
+    if not tournament:
+        await callback.answer("❌ Нет активного турнира", show_alert=True)
+        return
+    
+    fights = tournament.get("fights", [])
+    if not fights:
+        await callback.answer("❌ В турнире нет боёв", show_alert=True)
+        return
+    
+    await state.update_data(tournament_id=tournament.get("id"), fights_count=len(fights))
+    
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="finish_cancel")]
+    ])
+    
+    await callback.message.answer(
+        "🏁 <b>Завершение турнира</b>\n\n"
+        f"{format_fights_list(tournament)}\n"
+        "👇 <b>Введите результаты в формате:</b>\n"
+        "<code>1. 1\n"
+        "2. 2\n"
+        "3. 0</code>\n\n"
+        "<b>Правила:</b>\n"
+        "• Одна строка = один бой\n"
+        "• 1 - победил первый боец, 2 - второй\n"
+        "• 0 - ничья или бой отменён (ставки возвращаются)\n\n"
+        f"<i>Нужно ввести {len(fights)} строк</i>\n\n"
+        "Для отмены напишите /cancel",
+        parse_mode="HTML",
+        reply_markup=keyboard
+    )
+    
+    await state.set_state(FinishStates.waiting_for_results)
+    await callback.answer()
+
+
+@router.callback_query(lambda c: c.data == "finish_cancel", StateFilter(FinishStates))
+async def finish_cancel_handler(callback: CallbackQuery, state: FSMContext):
+    """Отмена завершения турнира"""
+    await state.clear()
+    await callback.message.answer("❌ Завершение турнира отменено")
+    await show_admin_panel(callback.message)
+    await callback.answer()
+
 
-@router.callback_query(lambda c: c.data == "admin_finish_ppv")
-async def admin_finish_ppv_handler(callback: CallbackQuery):
+@router.message(FinishStates.waiting_for_results, F.text)
+async def process_results_input(message: Message, state: FSMContext):
     """
-    Обработчик кнопки "Завершить текущий PPV"
+    Сохраняет результаты боёв и рассчитывает все ставки турнира
     """
-    logger.info(f"Администратор {callback.from_user.id} нажал 'Завершить текущий PPV'")
+    data = await state.get_data()
+    fights_count = data.get("fights_count", 0)
     
-    await callback.answer(
-        "Функция 'Завершить текущий PPV' в разработке.\n"
-        "Здесь будет подведение итогов и распределение призов.",
-        show_alert=True
-    )
\ No newline at end of file
+    success, error_msg, winners = parse_results_text(message.text, fights_count)
+    if not success:
+        await message.answer(
+            f"{error_msg}\n\n"
+            f"Пожалуйста, введите {fights_count} строк с результатами заново.\n"
+            f"Для отмены напишите /cancel"
+        )
+        return
+    
+    tournament_id = data.get("tournament_id")
+    current = storage.get_tournament(tournament_id)
+    if not current:
+        await message.answer("❌ Турнир не найден или уже завершён")
+        await state.clear()
+        return
+    
+    # Сохраняем результаты в турнир, чтобы расчёт можно было повторить
+    # Снятый с карда бой (см. handlers/event_poller.py) - всегда возврат ставок
+    fights = current.get("fights", ())
+    tournament = await storage.update_fights(
+        tournament_id,
+        {
+            fight_index: {"winner": "draw" if fights[fight_index].get("status") == CANCELLED else winner}
+            for fight_index, winner in enumerate(winners)
+        },
+        bets_open=False
+    )
+    if not tournament:
+        await message.answer("❌ Не удалось сохранить результаты боёв")
+        await state.clear()
+        return
+    fights = tournament.get("fights", [])
+    
+    await message.answer("🔄 Рассчитываю ставки...")
+    
+    try:
+        report = await async_db.settle_fights(tournament["id"], build_fight_results(fights))
+    except Exception as e:
+        logger.error(f"Ошибка при расчёте турнира {tournament['id']}: {e}")
+        await message.answer(
+            "❌ Ошибка при расчёте ставок. Ничего не выплачено - "
+            "можно повторить завершение турнира."
+        )
+        await state.clear()
+        await show_admin_panel(message)
+        return
+    
+    await storage.update_tournament(tournament["id"], status="finished")
+    
+    skipped_text = f" (уже были рассчитаны: {report['skipped']})" if report["skipped"] else ""
+    await message.answer(
+        f"✅ <b>Турнир завершён!</b>\n\n"
+        f"🥊 Рассчитано боёв: {report['fights']}{skipped_text}\n"
+        f"🎯 Ставок: {report['bets']}\n"
+        f"🏆 Выигравших ставок: {report['won']}\n"
+        f"💰 Начислено очков: {report['payout']:.2f}",
+        parse_mode="HTML"
+    )
+    logger.info(f"Администратор {message.from_user.id} завершил турнир {tournament['id']}")
+    
+    await state.clear()
+    await show_admin_panel(message)
+
+
+@router.message(FinishStates.waiting_for_results)
+async def invalid_results_input(message: Message):
+    """Обрабатывает некорректный ввод (не текст)"""
+    await message.answer(
+        "❌ Пожалуйста, введите результаты текстом.\n"
+        "Для отмены напишите /cancel"
+    )
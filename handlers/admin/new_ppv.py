@@ -1,5 +1,5 @@
 """
-Обработчик кнопки "Новый PPV" (только если нет активного турнира)
+Обработчик кнопки "Новый PPV" (активных турниров может быть несколько)
 """
 import logging
 from aiogram import Router
@@ -16,13 +16,13 @@ async def admin_new_ppv_handler(callback: CallbackQuery):
     """
     Обработчик кнопки "Новый PPV"
     """
-    # Проверяем, нет ли уже активного турнира
-    current_tournament = storage.get_current_tournament()
-    if current_tournament and current_tournament.get("status") == "active":
-        await callback.answer("❌ Уже есть активный PPV турнир!", show_alert=True)
-        return
+    # Активные турниры не мешают выбору нового (Fight Night и PPV в одну неделю)
+    active_count = len(storage.list_tournaments())
     
-    logger.info(f"Администратор {callback.from_user.id} нажал 'Новый PPV'")
+    logger.info(
+        f"Администратор {callback.from_user.id} нажал 'Новый PPV' "
+        f"(активных турниров: {active_count})"
+    )
     
     # Здесь будет переход к выбору турнира из API
     await callback.answer("Функция выбора нового PPV в разработке", show_alert=True)
\ No newline at end of file
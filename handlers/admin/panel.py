@@ -15,17 +15,17 @@ router = Router()
 
 def get_admin_menu() -> InlineKeyboardMarkup:
     """
-    Создает клавиатуру админского меню в зависимости от наличия активного турнира
+    Создает клавиатуру админского меню в зависимости от наличия активных турниров
     """
-    current_tournament = storage.get_current_tournament()
-    has_active_tournament = bool(current_tournament and current_tournament.get("status") == "active")
+    has_active_tournament = bool(storage.list_tournaments())
     
     keyboard_buttons = []
     
     if has_active_tournament:
         keyboard_buttons = [
-            [InlineKeyboardButton(text="🛑 Завершить текущий PPV", callback_data="admin_finish_ppv")],
+            [InlineKeyboardButton(text="🛑 Завершить PPV", callback_data="admin_finish_ppv")],
             [InlineKeyboardButton(text="📊 Ввести/изменить коэффициенты", callback_data="admin_set_odds")],
+            [InlineKeyboardButton(text="➕ Новый PPV", callback_data="admin_new_ppv")],
             [InlineKeyboardButton(text="📈 Статистика", callback_data="admin_stats")],
             [InlineKeyboardButton(text="📢 Объявление", callback_data="admin_announcement")],
             [InlineKeyboardButton(text="🚪 Выход", callback_data="admin_exit")]
@@ -41,18 +41,32 @@ def get_admin_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
 
 
+def get_tournament_choice_menu(action: str) -> InlineKeyboardMarkup:
+    """
+    Клавиатура выбора одного из активных турниров
+    callback_data кнопок: <action>_<id события>
+    """
+    keyboard_buttons = [
+        [InlineKeyboardButton(text=f"🏆 {tournament.get('name', 'Неизвестно')}",
+                              callback_data=f"{action}_{tournament['id']}")]
+        for tournament in storage.list_tournaments()
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+
+
 def get_admin_message_text(has_active_tournament: bool) -> str:
     """
     Возвращает текст сообщения админ-панели
     """
-    if has_active_tournament:
-        current_tournament = storage.get_current_tournament()
-        tournament_info = (
-            f"\n\n🏆 <b>Текущий PPV:</b>\n"
-            f"{current_tournament.get('name', 'Неизвестно')}\n"
-            f"📅 {current_tournament.get('date', 'Дата не указана')}\n"
-            f"📍 {current_tournament.get('location', 'Место не указано')}\n"
-            f"🥊 Боев: {len(current_tournament.get('fights', []))}"
+    tournaments = storage.list_tournaments() if has_active_tournament else ()
+    if tournaments:
+        title = "Текущий PPV" if len(tournaments) == 1 else "Активные PPV"
+        tournament_info = f"\n\n🏆 <b>{title}:</b>\n" + "\n\n".join(
+            f"{tournament.get('name', 'Неизвестно')}\n"
+            f"📅 {tournament.get('date', 'Дата не указана')}\n"
+            f"📍 {tournament.get('location', 'Место не указано')}\n"
+            f"🥊 Боев: {len(tournament.get('fights', []))}"
+            for tournament in tournaments
         )
     else:
         tournament_info = "\n\nℹ️ <b>Нет активного PPV турнира</b>"
@@ -74,8 +88,7 @@ async def admin_panel_handler(message: Message):
     
     logger.info(f"Администратор {user.username} (ID: {user.id}) зашел в админ-панель")
     
-    current_tournament = storage.get_current_tournament()
-    has_active_tournament = bool(current_tournament and current_tournament.get("status") == "active")
+    has_active_tournament = bool(storage.list_tournaments())
     
     message_text = get_admin_message_text(has_active_tournament)
     keyboard = get_admin_menu()
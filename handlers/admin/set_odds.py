@@ -10,6 +10,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from utils.json_storage import storage
+from db.database import CANCELLED
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -35,8 +36,9 @@ def format_fights_list(tournament_data: dict) -> str:
         
         type_emoji = "👑" if fight_type == "Главный" else "🥊"
         type_text = f" ({fight_type})" if fight_type else ""
+        cancelled_text = " ❌ снят с карда" if fight.get("status") == CANCELLED else ""
         
-        text += f"{i}. {type_emoji} <b>{fighter1} vs {fighter2}</b>{type_text}\n"
+        text += f"{i}. {type_emoji} <b>{fighter1} vs {fighter2}</b>{type_text}{cancelled_text}\n"
     
     return text
 
@@ -93,13 +95,28 @@ def parse_odds_text(odds_text: str, fights_count: int) -> tuple[bool, str, list]
     return True, "✅ Формат правильный", odds_list
 
 
-@router.callback_query(lambda c: c.data == "admin_set_odds")
+@router.callback_query(lambda c: c.data == "admin_set_odds" or c.data.startswith("admin_set_odds_"))
 async def admin_set_odds_start(callback: CallbackQuery, state: FSMContext):
     """
     Начало ввода коэффициентов
+    admin_set_odds_<id> - для конкретного турнира, admin_set_odds - для
+    единственного активного (если их несколько, предлагается выбрать)
     """
-    # Получаем текущий турнир
-    tournament = storage.get_current_tournament()
+    from handlers.admin.panel import get_tournament_choice_menu
+    
+    event_id = callback.data.replace("admin_set_odds", "").lstrip("_")
+    if event_id:
+        tournament = storage.get_tournament(event_id)
+    else:
+        tournaments = storage.list_tournaments()
+        if len(tournaments) > 1:
+            await callback.message.answer(
+                "📊 Для какого турнира ввести коэффициенты?",
+                reply_markup=get_tournament_choice_menu("admin_set_odds")
+            )
+            await callback.answer()
+            return
+        tournament = tournaments[0] if tournaments else None
     
     if not tournament:
         await callback.answer("❌ Нет активного турнира", show_alert=True)
@@ -181,42 +198,37 @@ async def process_odds_input(message: Message, state: FSMContext):
         )
         return
     
-    # Сохраняем коэффициенты в JSON
-    tournament = storage.get_current_tournament()
+    # Сохраняем коэффициенты в JSON: перезаписываются только изменённые бои
+    odds_updates = {
+        odds_data["fight_index"]: {
+            "odds": {
+                "fighter1": odds_data["fighter1_odds"],
+                "fighter2": odds_data["fighter2_odds"]
+            }
+        }
+        for odds_data in odds_list
+    }
+    tournament = await storage.update_fights(data.get("tournament_id"), odds_updates, has_odds=True)
+    
     if tournament:
-        # Добавляем коэффициенты к боям
-        fights = tournament.get("fights", [])
-        for odds_data in odds_list:
-            fight_index = odds_data["fight_index"]
-            if fight_index < len(fights):
-                fights[fight_index]["odds"] = {
-                    "fighter1": odds_data["fighter1_odds"],
-                    "fighter2": odds_data["fighter2_odds"]
-                }
+        # Формируем подтверждение
+        confirmation_text = "✅ <b>Коэффициенты сохранены!</b>\n\n"
         
-        # Обновляем турнир
-        tournament["fights"] = fights
-        tournament["has_odds"] = True
+        for i, fight in enumerate(tournament.get("fights", []), 1):
+            if "odds" in fight:
+                odds = fight["odds"]
+                fighter1 = fight.get("fighter1", "Боец 1")
+                fighter2 = fight.get("fighter2", "Боец 2")
+                
+                confirmation_text += (
+                    f"{i}. <b>{fighter1}</b>: {odds['fighter1']:.2f} | "
+                    f"<b>{fighter2}</b>: {odds['fighter2']:.2f}\n"
+                )
         
-        if storage.save_current_tournament(tournament):
-            # Формируем подтверждение
-            confirmation_text = "✅ <b>Коэффициенты сохранены!</b>\n\n"
-            
-            for i, fight in enumerate(fights, 1):
-                if "odds" in fight:
-                    odds = fight["odds"]
-                    fighter1 = fight.get("fighter1", "Боец 1")
-                    fighter2 = fight.get("fighter2", "Боец 2")
-                    
-                    confirmation_text += (
-                        f"{i}. <b>{fighter1}</b>: {odds['fighter1']:.2f} | "
-                        f"<b>{fighter2}</b>: {odds['fighter2']:.2f}\n"
-                    )
-            
-            await message.answer(confirmation_text, parse_mode="HTML")
-            logger.info(f"Администратор {message.from_user.id} сохранил коэффициенты")
-        else:
-            await message.answer("❌ Ошибка при сохранении коэффициентов")
+        await message.answer(confirmation_text, parse_mode="HTML")
+        logger.info(f"Администратор {message.from_user.id} сохранил коэффициенты")
+    else:
+        await message.answer("❌ Ошибка при сохранении коэффициентов")
     
     await state.clear()
     await show_admin_panel(message)
@@ -237,8 +249,7 @@ async def show_admin_panel(message: Message):
     """
     from handlers.admin.panel import get_admin_menu, get_admin_message_text
     
-    current_tournament = storage.get_current_tournament()
-    has_active_tournament = bool(current_tournament and current_tournament.get("status") == "active")
+    has_active_tournament = bool(storage.list_tournaments())
     
     await message.answer(
         get_admin_message_text(has_active_tournament),
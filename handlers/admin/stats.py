@@ -5,9 +5,29 @@ import logging
 from aiogram import Router
 from aiogram.types import CallbackQuery
 
+from handlers.ufc_api import ufc_api
+
 logger = logging.getLogger(__name__)
 router = Router()
 
+BREAKER_LABELS = {
+    "closed": "✅ доступен",
+    "open": "⛔ недоступен, ответы из кэша",
+    "half_open": "⏳ пробный запрос",
+}
+
+
+def format_espn_status(status: dict) -> str:
+    """Состояние ESPN API для админа (circuit breaker и последний успешный ответ)"""
+    lines = [f"🌐 <b>ESPN API:</b> {BREAKER_LABELS.get(status['state'], status['state'])}"]
+    if status["failures"]:
+        lines.append(f"Неудачных запросов подряд: {status['failures']}")
+    if status["retry_in"] is not None:
+        lines.append(f"Повтор через {status['retry_in']:.0f} сек")
+    if status["last_success_ago"] is not None:
+        lines.append(f"Последний ответ ESPN: {status['last_success_ago'] / 60:.0f} мин назад")
+    return "\n".join(lines)
+
 
 @router.callback_query(lambda c: c.data == "admin_stats")
 async def admin_stats_handler(callback: CallbackQuery):
@@ -16,5 +36,8 @@ async def admin_stats_handler(callback: CallbackQuery):
     """
     logger.info(f"Администратор {callback.from_user.id} нажал 'Статистика'")
     
-    await callback.message.answer("Вы нажали на кнопку <b>Статистика</b>", parse_mode="HTML")
+    await callback.message.answer(
+        f"Вы нажали на кнопку <b>Статистика</b>\n\n{format_espn_status(ufc_api.status())}",
+        parse_mode="HTML"
+    )
     await callback.answer()
\ No newline at end of file
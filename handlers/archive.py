@@ -1,13 +1,69 @@
 """
 Обработчики для архива турниров
 """
+import asyncio
+import html
 import logging
 from aiogram import Router
-from aiogram.types import CallbackQuery
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+
+from utils.json_storage import storage
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+def format_archive_record(record: dict) -> str:
+    """Краткая карточка турнира из архива"""
+    fights = record.get("fights", [])
+    totals = record.get("totals", {})
+    decided = sum(1 for fight in fights if fight.get("w"))
+    
+    text = (
+        f"🏆 <b>{html.escape(record.get('name') or 'Неизвестный турнир')}</b>\n"
+        f"📅 {record.get('date') or 'Дата не указана'}\n"
+        f"🥊 Боёв: {len(fights)}, с результатом: {decided}\n"
+        f"🎯 Ставок: {totals.get('bets', 0)} от {totals.get('users', 0)} игроков, "
+        f"выплачено {totals.get('payout', 0):.2f} очк.\n"
+    )
+    if record.get("status") != "finished":
+        text += "<i>Турнир закрыт без результатов</i>\n"
+    return text
+
+
+def archive_page_keyboard(page: int, pages: int) -> InlineKeyboardMarkup:
+    """Кнопки листания истории: archive_page_<N>"""
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton(text="⬅️ Новее", callback_data=f"archive_page_{page - 1}"))
+    if page < pages - 1:
+        buttons.append(InlineKeyboardButton(text="Старее ➡️", callback_data=f"archive_page_{page + 1}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons] if buttons else [])
+
+
+async def send_archive_page(callback: CallbackQuery, page: int):
+    """
+    Показывает страницу архива (читаются только записи этой страницы)
+    Чтение с диска - в отдельном потоке, event loop не ждёт файл
+    """
+    records, pages = await asyncio.to_thread(storage.archive.read_page, page)
+    
+    if not records:
+        # Страница 0 есть всегда, если в архиве хоть одна запись
+        if page == 0:
+            await callback.message.answer("📚 История турниров пока пуста.")
+        else:
+            await callback.message.answer(f"❌ Такой страницы нет (всего страниц: {pages}).")
+        return
+    
+    text = f"📚 <b>История турниров</b> (стр. {page + 1}/{pages})\n\n"
+    text += "\n".join(format_archive_record(record) for record in records)
+    
+    await callback.message.answer(
+        text,
+        parse_mode="HTML",
+        reply_markup=archive_page_keyboard(page, pages)
+    )
+
 
 @router.callback_query(lambda c: c.data == "archive")
 async def archive_handler(callback: CallbackQuery):
@@ -16,6 +72,20 @@ async def archive_handler(callback: CallbackQuery):
     """
     logger.info(f"Пользователь {callback.from_user.id} запросил архив турниров")
     
-    # TODO: Здесь будет логика отображения истории турниров
-    await callback.message.answer("Вы нажали кнопку \"История турниров\"")
+    await send_archive_page(callback, 0)
+    await callback.answer()
+
+
+@router.callback_query(lambda c: c.data.startswith("archive_page_"))
+async def archive_page_handler(callback: CallbackQuery):
+    """
+    Листание истории турниров
+    """
+    try:
+        page = int(callback.data.replace("archive_page_", ""))
+    except ValueError:
+        await callback.answer("❌ Неверная страница", show_alert=True)
+        return
+    
+    await send_archive_page(callback, page)
     await callback.answer()
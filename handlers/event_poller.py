@@ -0,0 +1,150 @@
+"""
+Фоновый опрос ESPN: держит готовый снимок предстоящих турниров и кардов
+
+Снимок публикуется в кэше ufc_api до следующего опроса, поэтому обработчики
+("Новый PPV", список боёв) отвечают без ожидания сети. Изменения карда
+(бой добавлен или снят) переносятся в активные турниры
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .ufc_api import UFCAPIClient, ScoreboardSnapshot, ufc_api
+from db.database import CANCELLED
+from utils.json_storage import JSONStorage, storage
+
+logger = logging.getLogger(__name__)
+
+# Интервал опроса в зависимости от времени до ближайшего турнира:
+# (до начала меньше N секунд -> опрашивать каждые M секунд), по возрастанию N
+POLL_SCHEDULE: List[Tuple[float, float]] = [
+    (6 * 3600, 5 * 60),         # последние 6 часов и сам турнир - каждые 5 минут
+    (24 * 3600, 15 * 60),       # день до турнира - каждые 15 минут
+    (7 * 24 * 3600, 60 * 60),   # неделя - каждый час
+]
+IDLE_INTERVAL_SEC = 6 * 3600    # ближайших турниров нет
+RETRY_INTERVAL_SEC = 5 * 60     # ESPN не ответил
+
+# Турнир считается идущим ещё столько секунд после начала (кард может меняться)
+EVENT_DURATION_SEC = 8 * 3600
+
+def _fight_key(fight) -> frozenset:
+    """Бой определяется парой бойцов (порядок в паре не важен)"""
+    return frozenset((fight.get("fighter1"), fight.get("fighter2")))
+
+
+def diff_fight_card(current_fights, espn_fights: Sequence[Dict]) -> Tuple[List[Dict], Dict[int, Dict]]:
+    """
+    Сравнивает кард турнира с ESPN, не трогая индексы боёв (на них ссылаются ставки)
+    Возвращает (новые бои для добавления в конец, {индекс: изменения статуса})
+    """
+    espn_keys = {_fight_key(fight) for fight in espn_fights}
+    known_keys = set()
+    status_updates = {}
+    
+    for fight_index, fight in enumerate(current_fights):
+        key = _fight_key(fight)
+        known_keys.add(key)
+        if fight.get("winner"):
+            continue  # бой уже рассчитан
+        cancelled = fight.get("status") == CANCELLED
+        if key not in espn_keys and not cancelled:
+            status_updates[fight_index] = {"status": CANCELLED}
+        elif key in espn_keys and cancelled:
+            status_updates[fight_index] = {"status": None}  # бой вернули в кард
+    
+    new_fights = [fight for fight in espn_fights if _fight_key(fight) not in known_keys]
+    return new_fights, status_updates
+
+
+class EventPoller:
+    def __init__(self, client: UFCAPIClient, tournament_storage: JSONStorage):
+        self.client = client
+        self.storage = tournament_storage
+        self._task: Optional[asyncio.Task] = None
+    
+    def _next_interval(self, snapshot: ScoreboardSnapshot) -> float:
+        """Чем ближе ближайший турнир (активный или предстоящий), тем чаще опрос"""
+        now = time.time()
+        event_ids = {str(tournament["id"]) for tournament in self.storage.list_tournaments()}
+        event_ids.update(event.id for event in snapshot.upcoming)
+        
+        nearest = None
+        for event_id in event_ids:
+            event = snapshot.by_id.get(event_id)
+            timestamp = event.timestamp if event else None
+            if timestamp is None or timestamp + EVENT_DURATION_SEC < now:
+                continue
+            seconds_left = max(timestamp - now, 0)
+            nearest = seconds_left if nearest is None else min(nearest, seconds_left)
+        
+        if nearest is None:
+            return IDLE_INTERVAL_SEC
+        for threshold, interval in POLL_SCHEDULE:
+            if nearest < threshold:
+                return interval
+        return IDLE_INTERVAL_SEC
+    
+    async def sync_active_tournaments(self, snapshot: ScoreboardSnapshot) -> int:
+        """Переносит изменения карда в активные турниры. Возвращает число изменённых турниров"""
+        changed = 0
+        for tournament in self.storage.list_tournaments():
+            tournament_id = str(tournament["id"])
+            event = snapshot.by_id.get(tournament_id)
+            if event is None or not event.fights:
+                continue  # турнира нет в ответе или кард ещё не объявлен
+            
+            new_fights, status_updates = diff_fight_card(tournament.get("fights", ()), event.fights)
+            if not new_fights and not status_updates:
+                continue
+            
+            if status_updates:
+                await self.storage.update_fights(tournament_id, status_updates)
+            if new_fights:
+                await self.storage.append_fights(tournament_id, new_fights)
+            changed += 1
+            logger.info(
+                f"Кард турнира {tournament_id} обновлён по ESPN: "
+                f"новых боёв {len(new_fights)}, изменён статус {len(status_updates)}"
+            )
+        return changed
+    
+    async def poll_once(self) -> float:
+        """Один опрос: обновить снимок, синхронизировать карды. Возвращает паузу до следующего"""
+        try:
+            snapshot, fresh = await self.client.refresh()
+            if not fresh:
+                # Старый снимок не продлеваем и карды по нему не синхронизируем:
+                # обработчики сами обратятся к ESPN по истечении обычного TTL
+                logger.warning("ESPN не ответил, фоновый опрос повторится раньше обычного")
+                return RETRY_INTERVAL_SEC
+            
+            interval = self._next_interval(snapshot)
+            # Снимок живёт в кэше до следующего опроса (с запасом)
+            self.client.publish(snapshot, ttl=interval + 60)
+            await self.sync_active_tournaments(snapshot)
+            return interval
+        except Exception as e:
+            logger.error(f"Ошибка фонового опроса ESPN: {e}")
+            return RETRY_INTERVAL_SEC
+    
+    async def _loop(self):
+        while True:
+            interval = await self.poll_once()
+            logger.info(f"Следующий опрос ESPN через {interval / 60:.0f} мин")
+            await asyncio.sleep(interval)
+    
+    def start(self):
+        """Запускает фоновый опрос (вызывается из main.py внутри event loop)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Глобальный опрос для общего клиента и хранилища турниров
+event_poller = EventPoller(ufc_api, storage)
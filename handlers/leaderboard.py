@@ -1,13 +1,45 @@
 """
 Обработчики для статистики и таблицы лидеров
 """
+import html
 import logging
 from aiogram import Router
 from aiogram.types import CallbackQuery
 
+from db.async_database import async_db
+
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Сколько строк показывать в таблице лидеров
+TOP_LIMIT = 10
+
+
+def format_leaderboard(top_scores: list, user_score, user_rank) -> str:
+    """Формирует текст таблицы лидеров и строку с местом пользователя"""
+    if not top_scores:
+        return "📊 <b>Таблица лидеров</b>\n\nПока нет рассчитанных ставок."
+    
+    medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+    text = "📊 <b>Таблица лидеров</b>\n\n"
+    for place, score in enumerate(top_scores, 1):
+        name = html.escape(score.name) if score.name else f"ID {score.user_id}"
+        text += (
+            f"{medals.get(place, f'{place}.')} <b>{name}</b> — {score.points:.2f} очк. "
+            f"({score.wins}/{score.bets} угадано)\n"
+        )
+    
+    if user_score and user_rank:
+        text += (
+            f"\n👤 <b>Ваше место:</b> {user_rank}\n"
+            f"Очки: {user_score.points:.2f} | Угадано: {user_score.wins}/{user_score.bets} | "
+            f"ROI: {user_score.roi:+.1f}%"
+        )
+    else:
+        text += "\n👤 У вас пока нет рассчитанных ставок."
+    
+    return text
+
 
 @router.callback_query(lambda c: c.data == "leaderboard")
 async def leaderboard_handler(callback: CallbackQuery):
@@ -16,6 +48,14 @@ async def leaderboard_handler(callback: CallbackQuery):
     """
     logger.info(f"Пользователь {callback.from_user.id} запросил статистику")
     
-    # TODO: Здесь будет логика отображения таблицы лидеров
-    await callback.message.answer("Вы нажали кнопку \"Статистика\"")
+    # Топ - чтение первых строк индекса user_scores, место - подсчёт строк выше
+    # пользователя по тому же индексу (дороже для нижних мест, выполняется в потоке БД)
+    top_scores = await async_db.get_top_scores(TOP_LIMIT)
+    user_score = await async_db.get_user_score(callback.from_user.id)
+    user_rank = await async_db.get_user_rank(callback.from_user.id) if user_score else None
+    
+    await callback.message.answer(
+        format_leaderboard(top_scores, user_score, user_rank),
+        parse_mode="HTML"
+    )
     await callback.answer()
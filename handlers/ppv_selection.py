@@ -5,6 +5,7 @@ import logging
 from aiogram import Router
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from .ufc_api import ufc_api
+from utils.json_storage import storage
 
 logger = logging.getLogger(__name__)
 router = Router()  # ← ВАЖНО: эта строка должна быть здесь!
@@ -18,7 +19,7 @@ def format_events_for_menu(events: list) -> InlineKeyboardMarkup:
     
     # Добавляем кнопки для каждого турнира
     for i, event in enumerate(events, 1):
-        event_name = event['name']
+        event_name = event.name
         
         # Форматируем текст для кнопки
         if ":" in event_name:
@@ -34,7 +35,7 @@ def format_events_for_menu(events: list) -> InlineKeyboardMarkup:
             button_text = button_text[:61] + "..."
         
         # Создаем callback_data в формате: select_ppv_123456
-        callback_data = f"select_ppv_{event['id']}"
+        callback_data = f"select_ppv_{event.id}"
         
         # ОДНА КНОПКА НА ТУРНИР!
         keyboard.append([InlineKeyboardButton(
@@ -63,7 +64,7 @@ async def admin_new_ppv_handler(callback: CallbackQuery):
     await callback.answer("🔄 Ищу предстоящие турниры...")
     
     # Получаем турниры из API
-    events = ufc_api.get_upcoming_events()
+    events = await ufc_api.get_upcoming_events()
     
     if not events:
         await callback.message.answer(
@@ -72,12 +73,20 @@ async def admin_new_ppv_handler(callback: CallbackQuery):
         )
         return
     
+    # Уже выбиравшиеся турниры (активные и закрытые) повторно не выбираются:
+    # пересохранение стёрло бы результаты и коэффициенты боёв
+    known_ids = await storage.get_known_ids([event.id for event in events])
+    events = [event for event in events if event.id not in known_ids]
+    if not events:
+        await callback.message.answer("ℹ️ Все предстоящие турниры уже добавлены в активные или закрыты.")
+        return
+    
     # Формируем текст сообщения
     message_text = "🏆 <b>Найдены турниры:</b>\n\n"
     for i, event in enumerate(events, 1):
-        message_text += f"{i}. <b>{event['name']}</b>\n"
-        message_text += f"   📅 {event['date']}\n"
-        message_text += f"   📍 {event['location']}\n\n"
+        message_text += f"{i}. <b>{event.name}</b>\n"
+        message_text += f"   📅 {event.date}\n"
+        message_text += f"   📍 {event.location}\n\n"
     
     message_text += "👇 Выберите турнир для создания PPV:"
     
@@ -6,7 +6,7 @@ from aiogram import Router
 from aiogram.filters import CommandStart
 from aiogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup
 
-from db.database import db
+from db.async_database import async_db
 from db.models import User
 
 logger = logging.getLogger(__name__)
@@ -41,7 +41,7 @@ async def start_handler(message: Message):
     )
     
     # Добавляем/обновляем в базе
-    is_new_user = db.add_or_update_user(user_obj)
+    is_new_user = await async_db.add_or_update_user(user_obj)
     
     # Формируем приветствие
     welcome_text = "Привет! Я живой 🙂"
@@ -18,8 +18,15 @@ async def confirm_tournament_selection(callback: CallbackQuery):
     """
     event_id = callback.data.replace("confirm_tournament_", "")
     
+    if storage.get_tournament(event_id) is not None:
+        await callback.answer("ℹ️ Этот турнир уже активен", show_alert=True)
+        return
+    if await storage.get_known_ids([event_id]):
+        await callback.answer("ℹ️ Этот турнир уже закрыт", show_alert=True)
+        return
+    
     # Получаем информацию о турнире
-    event = ufc_api.get_event_by_id(event_id)
+    event = await ufc_api.get_event_by_id(event_id)
     if not event:
         await callback.answer(
             "❌ Не удалось загрузить информацию о турнире",
@@ -28,23 +35,24 @@ async def confirm_tournament_selection(callback: CallbackQuery):
         return
     
     # Получаем бои турнира
-    fights = ufc_api.get_event_fights(event_id)
+    fights = await ufc_api.get_event_fights(event_id)
     
     # Подготавливаем данные для сохранения
     tournament_data = {
         "id": event_id,
-        "name": event["name"],
-        "date": event["date"],
-        "location": event["location"],
+        "name": event.name,
+        "date": event.date,
+        "timestamp": event.timestamp,  # Unix-время начала: от него считается срок турнира
+        "location": event.location,
         "fights": fights,
         "status": "active",
         "bets_open": True,
     }
     
-    # Сохраняем в JSON
-    if storage.save_current_tournament(tournament_data):
+    # Сохраняем в реестр активных турниров
+    if await storage.activate_tournament(tournament_data):
         await callback.answer(
-            f"✅ Турнир '{event['name']}' сохранен как текущий!",
+            f"✅ Турнир '{event.name}' сохранен как текущий!",
             show_alert=True
         )
         
@@ -109,7 +117,7 @@ async def show_tournament_fights(callback: CallbackQuery):
     await callback.answer("🔄 Загружаем информацию о боях...")
     
     # Получаем информацию о турнире
-    event = ufc_api.get_event_by_id(event_id)
+    event = await ufc_api.get_event_by_id(event_id)
     if not event:
         await callback.message.answer(
             "❌ Не удалось найти информацию о выбранном турнире.\n"
@@ -118,12 +126,12 @@ async def show_tournament_fights(callback: CallbackQuery):
         return
     
     # Получаем бои турнира
-    fights = ufc_api.get_event_fights(event_id)
+    fights = await ufc_api.get_event_fights(event_id)
     
     # Формируем сообщение
-    message_text = f"🏆 <b>{event['name']}</b>\n"
-    message_text += f"📅 {event['date']}\n"
-    message_text += f"📍 {event['location']}\n\n"
+    message_text = f"🏆 <b>{event.name}</b>\n"
+    message_text += f"📅 {event.date}\n"
+    message_text += f"📍 {event.location}\n\n"
     
     if fights:
         message_text += "🥊 <b>Кард боев (от главного к предварительным):</b>\n\n"
@@ -7,6 +7,11 @@ from aiogram.fsm.storage.memory import MemoryStorage  # Импорт для FSM
 from dotenv import load_dotenv
 
 from handlers import get_all_routers
+from db.async_database import async_db
+from utils.scheduler import expiry_scheduler
+from utils.json_storage import storage as tournament_storage
+from handlers.ufc_api import ufc_api
+from handlers.event_poller import event_poller
 
 # -----------------------
 # Настройка логов
@@ -69,6 +74,19 @@ async def main():
     # 5. Устанавливаем команды в меню бота
     await set_bot_commands(bot)
     
+    # 6. Запускаем фоновую запись буфера пользователей в БД
+    async_db.start()
+    
+    # 7. Читаем активные турниры из БД и запускаем планировщик их устаревания
+    await tournament_storage.load()
+    await expiry_scheduler.start()
+    
+    # 8. Поднимаем последний снимок ESPN с диска (без ожидания сети)
+    await ufc_api.warm_up()
+    
+    # 9. Запускаем фоновый опрос ESPN (снимок турниров и синхронизация кардов)
+    event_poller.start()
+    
     logger.info("Бот запущен! Ожидание сообщений...")
     
     # ================================================================
@@ -87,6 +105,14 @@ async def main():
             logger.info("Сессия бота закрыта.")
         except:
             pass
+
+        expiry_scheduler.stop()
+        event_poller.stop()
+        await ufc_api.close()
+
+        # Дописываем очередь запросов к БД и закрываем соединение
+        async_db.close()
+        async_db.db.close()
         logger.info("Бот завершил работу.")
     # ================================================================
     # ================================================================
@@ -0,0 +1,124 @@
+"""
+Архив завершённых турниров
+
+Только дозапись: data/archive/tournaments.jsonl - по одному турниру на строку
+(компактный JSON), data/archive/tournaments.idx - смещения строк, 8 байт на
+запись. Страница N читается через seek по индексу, без чтения всей истории
+"""
+import json
+import os
+import struct
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Смещение строки в jsonl: unsigned long long, little-endian
+OFFSET_FORMAT = "<Q"
+OFFSET_SIZE = struct.calcsize(OFFSET_FORMAT)
+
+# Турниров на одной странице истории
+PAGE_SIZE = 5
+
+
+def build_archive_record(tournament: Mapping[str, Any], totals: Dict[str, Any]) -> Dict[str, Any]:
+    """Компактная запись архива: турнир, бои с коэффициентами и результатами, итоги ставок"""
+    fights = []
+    for fight in tournament.get("fights", ()):
+        odds = fight.get("odds") or {}
+        fights.append({
+            "f1": fight.get("fighter1"),
+            "f2": fight.get("fighter2"),
+            "o1": odds.get("fighter1"),
+            "o2": odds.get("fighter2"),
+            "w": fight.get("winner"),
+        })
+    return {
+        "id": tournament.get("id"),
+        "name": tournament.get("name"),
+        "date": tournament.get("date"),
+        "location": tournament.get("location"),
+        "status": tournament.get("status"),
+        "archived_at": datetime.now().isoformat(timespec="seconds"),
+        "fights": fights,
+        "totals": totals,
+    }
+
+
+class TournamentArchive:
+    def __init__(self, data_dir: str = "data"):
+        self.archive_dir = os.path.join(data_dir, "archive")
+        self.data_path = os.path.join(self.archive_dir, "tournaments.jsonl")
+        self.index_path = os.path.join(self.archive_dir, "tournaments.idx")
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._repair_index()
+    
+    def _repair_index(self):
+        """
+        Отрезает недописанное смещение после сбоя. Строка jsonl без смещения
+        в индексе не читается и просто остаётся в файле
+        """
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.index_path)
+        if size % OFFSET_SIZE:
+            logger.warning("Индекс архива повреждён на конце, обрезаем неполную запись")
+            with open(self.index_path, "r+b") as f:
+                f.truncate(size - size % OFFSET_SIZE)
+    
+    def count(self) -> int:
+        """Количество турниров в архиве (по размеру индекса)"""
+        try:
+            return os.path.getsize(self.index_path) // OFFSET_SIZE
+        except FileNotFoundError:
+            return 0
+    
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Дописывает турнир в архив. Сначала строка данных, затем её смещение:
+        запись видна читателям, только когда целиком лежит на диске
+        Возвращает номер записи
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.data_path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line.encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.index_path, "ab") as f:
+                f.write(struct.pack(OFFSET_FORMAT, offset))
+                f.flush()
+                os.fsync(f.fileno())
+            number = self.count() - 1
+        logger.info(f"Турнир {record.get('id')} добавлен в архив (запись {number})")
+        return number
+    
+    def read_page(self, page: int, page_size: int = PAGE_SIZE) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Страница архива, новые турниры первыми (page с 0)
+        Читается page_size смещений и page_size строк. Возвращает (записи, всего_страниц)
+        """
+        total = self.count()
+        pages = max(1, -(-total // page_size))
+        if total == 0 or not 0 <= page < pages:
+            return [], pages
+        
+        # Записи с номерами [first, last) - страница 0 это самые последние
+        last = total - page * page_size
+        first = max(0, last - page_size)
+        
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(first * OFFSET_SIZE)
+            raw = index_file.read((last - first) * OFFSET_SIZE)
+        offsets = [offset for (offset,) in struct.iter_unpack(OFFSET_FORMAT, raw)]
+        
+        records = []
+        with open(self.data_path, "rb") as data_file:
+            for offset in reversed(offsets):
+                data_file.seek(offset)
+                records.append(json.loads(data_file.readline()))
+        return records, pages
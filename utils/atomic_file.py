@@ -0,0 +1,40 @@
+"""
+Атомарная запись файлов (экспорт турниров, HTTP-кэш ESPN)
+
+Временный файл в той же папке + fsync + rename: при сбое на диске остаётся
+либо старая, либо новая версия файла целиком
+"""
+import os
+import tempfile
+
+
+def write_atomic(path: str, payload: bytes):
+    """Записывает payload в path атомарно"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # fsync папки, чтобы сам rename пережил сбой питания (не везде поддерживается)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
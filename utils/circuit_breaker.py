@@ -0,0 +1,76 @@
+"""
+Circuit breaker для внешних API
+
+closed - запросы идут как обычно. После failure_threshold неудач подряд
+переходит в open: запросы не выполняются cooldown_sec секунд, вызывающий
+сразу берёт последние сохранённые данные. Затем half_open - пропускается
+один пробный запрос: успех закрывает breaker, неудача снова открывает
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Неудачных запросов подряд до размыкания и пауза перед пробным запросом
+FAILURE_THRESHOLD = 5
+COOLDOWN_SEC = 60
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, cooldown_sec: float = COOLDOWN_SEC):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+    
+    @property
+    def state(self) -> str:
+        """Текущее состояние (open по истечении паузы становится half_open)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_sec:
+            self._set_state(HALF_OPEN)
+            self._probing = False
+        return self._state
+    
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"Circuit breaker {self.name}: {self._state} -> {state}")
+            self._state = state
+    
+    def allow_request(self) -> bool:
+        """Можно ли выполнить запрос (в half_open - только один пробный)"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+    
+    def record_success(self):
+        self._failures = 0
+        self._probing = False
+        self._opened_at = None
+        self._set_state(CLOSED)
+    
+    def record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+    
+    def status(self) -> Dict[str, Any]:
+        """Состояние для мониторинга: state, failures, retry_in (секунд до пробного запроса)"""
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = max(0.0, self._opened_at + self.cooldown_sec - time.monotonic())
+        return {"state": state, "failures": self._failures, "retry_in": retry_in}
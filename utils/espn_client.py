@@ -0,0 +1,524 @@
+"""
+Клиент UFC/MMA API (ESPN)
+
+Без глобального экземпляра и без зависимостей от бота: его импортируют
+бенчмарки. Общий клиент бота - handlers/ufc_api.py
+"""
+import asyncio
+import aiohttp
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, List, Dict, Optional, Tuple
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from utils.circuit_breaker import CircuitBreaker, OPEN
+from utils.http_cache import HTTPDiskCache
+
+logger = logging.getLogger(__name__)
+
+# Адрес ESPN API. ESPN_BASE_URL подменяет его, например, на локальную заглушку
+# из benchmarks/espn_stub_server.py для нагрузочных тестов без сети
+ESPN_BASE_URL = os.getenv("ESPN_BASE_URL", "http://site.api.espn.com/apis/site/v2/sports/mma/ufc")
+
+# Таймауты запроса к ESPN (секунды): установка соединения и весь запрос целиком
+CONNECT_TIMEOUT_SEC = 5
+TOTAL_TIMEOUT_SEC = 15
+
+# Пул соединений: одновременных соединений и время жизни простаивающего keep-alive
+POOL_LIMIT = 10
+KEEPALIVE_TIMEOUT_SEC = 30
+
+# Повторы GET при таймауте, ошибке соединения или 5xx/429: всего попыток
+# и экспоненциальная пауза между ними (база * 2^n со случайным разбросом, не больше максимума)
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY_SEC = 0.5
+RETRY_MAX_DELAY_SEC = 4
+
+# Один документ scoreboard на все методы: сколько событий запрашивать,
+# сколько секунд он считается свежим и сколько разных ответов держать в памяти
+SCOREBOARD_LIMIT = "50"
+SCOREBOARD_TTL_SEC = 60
+SCOREBOARD_CACHE_SIZE = 4
+
+
+class Event:
+    """
+    Разобранное событие ESPN: только поля, нужные боту
+    Дата хранится как Unix-время (сортировка - сравнение чисел), строка для
+    показа собирается по запросу. Сырой JSON события не хранится:
+    при необходимости его читает UFCAPIClient.get_raw_event с диска
+    """
+    
+    __slots__ = ("id", "name", "timestamp", "location", "fights")
+    
+    def __init__(
+        self,
+        event_id: str,
+        name: str,
+        timestamp: Optional[float],
+        location: str,
+        fights: Tuple[Dict, ...] = ()
+    ):
+        self.id = event_id
+        self.name = name
+        self.timestamp = timestamp  # Unix-время начала (UTC) или None
+        self.location = location
+        self.fights = fights  # Бои от главного к предварительным
+    
+    @property
+    def date(self) -> str:
+        """Дата для показа, как в ответе ESPN - UTC"""
+        if self.timestamp is None:
+            return "Дата не указана"
+        return datetime.fromtimestamp(self.timestamp, timezone.utc).strftime("%d.%m.%Y %H:%M")
+    
+    def __repr__(self):
+        return f"Event({self.id}, {self.name})"
+
+
+class ScoreboardSnapshot:
+    """
+    Разобранный документ scoreboard: все события разбираются один раз при загрузке
+    by_id - id события -> Event, upcoming - UFC события по дате
+    Снимок не меняется после создания: его читают обработчики и фоновый опрос
+    """
+    __slots__ = ("by_id", "upcoming", "fetched_at")
+    
+    def __init__(self, by_id: Dict[str, Event], upcoming: List[Event]):
+        self.by_id = MappingProxyType(by_id)
+        self.upcoming = tuple(upcoming)
+        self.fetched_at = time.time()
+
+
+class UFCAPIClient:
+    """Асинхронный клиент для работы с ESPN UFC API"""
+    
+    def __init__(
+        self,
+        connect_timeout: float = CONNECT_TIMEOUT_SEC,
+        total_timeout: float = TOTAL_TIMEOUT_SEC,
+        pool_limit: int = POOL_LIMIT,
+        cache_ttl: float = SCOREBOARD_TTL_SEC,
+        cache_size: int = SCOREBOARD_CACHE_SIZE,
+        http_cache: Optional[HTTPDiskCache] = None,
+        retry_attempts: int = RETRY_ATTEMPTS,
+        breaker: Optional[CircuitBreaker] = None,
+        base_url: str = ESPN_BASE_URL
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.pool_limit = pool_limit
+        self.headers = {
+            'User-Agent': 'UFC-Bot/1.0 (+https://github.com/Krooxe/my_new_bot)'
+        }
+        # Сессия создаётся при первом запросе - внутри работающего event loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Кэш разобранных ответов: ключ запроса -> (момент устаревания, снимок)
+        # Порядок - от давно использованных к недавним, лишние вытесняются
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple, Tuple[float, ScoreboardSnapshot]]" = OrderedDict()
+        
+        # Запросы в полёте: ключ -> задача загрузки. Одновременные вызовы
+        # с одним ключом ждут одну и ту же задачу вместо своих запросов к ESPN
+        self._inflight: Dict[Tuple, "asyncio.Task"] = {}
+        
+        # Тела ответов и ETag/Last-Modified на диске: условные запросы и
+        # быстрый холодный старт после перезапуска
+        self.http_cache = http_cache or HTTPDiskCache()
+        
+        # Повторы неудачных запросов и размыкание при серии неудач:
+        # пока ESPN лежит, отвечаем последним снимком, не дёргая его запросами
+        self.retry_attempts = max(1, retry_attempts)
+        self.breaker = breaker or CircuitBreaker("ESPN")
+        self._last_success_at: Optional[float] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Общая сессия с пулом keep-alive соединений"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                keepalive_timeout=KEEPALIVE_TIMEOUT_SEC,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers=self.headers
+            )
+        return self._session
+    
+    async def close(self):
+        """Закрывает сессию и соединения пула (вызывается из main.py)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    @staticmethod
+    def _http_key(path: str, params: Dict[str, str]) -> str:
+        """Ключ дискового кэша: путь и отсортированные параметры запроса"""
+        return f"{path}?{urlencode(sorted(params.items()))}"
+    
+    @staticmethod
+    def _retry_delay(attempt: int) -> float:
+        """Пауза перед повтором номер attempt (с 1): full jitter от экспоненты"""
+        return random.uniform(0, min(RETRY_MAX_DELAY_SEC, RETRY_BASE_DELAY_SEC * 2 ** attempt))
+    
+    def status(self) -> Dict[str, Any]:
+        """Состояние клиента для мониторинга: circuit breaker и секунды с последнего ответа ESPN"""
+        last_success_ago = None
+        if self._last_success_at is not None:
+            last_success_ago = time.monotonic() - self._last_success_at
+        return {**self.breaker.status(), "last_success_ago": last_success_ago}
+    
+    def _record_success(self):
+        self.breaker.record_success()
+        self._last_success_at = time.monotonic()
+    
+    async def _get_json(self, path: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Условный GET к ESPN с таймаутом: 304 - тело берётся с диска, 200 - тело
+        и валидаторы сохраняются на диск. Таймауты, ошибки соединения, 5xx/429
+        и тело 200, которое не разбирается как JSON, повторяются с паузой; если
+        все попытки неудачны или breaker разомкнут, возвращается последний
+        сохранённый ответ. None - данных нет ни в сети, ни на диске.
+        Отмена (CancelledError) не перехватывается и прерывает запрос
+        """
+        key = self._http_key(path, params)
+        if not self.breaker.allow_request():
+            logger.warning(f"ESPN недоступен (breaker разомкнут), {path} берём с диска")
+            return await self._read_cached_json(key)
+        
+        headers = self.http_cache.conditional_headers(key)
+        for attempt in range(self.retry_attempts):
+            if attempt:
+                await asyncio.sleep(self._retry_delay(attempt))
+            try:
+                async with self._get_session().get(
+                    f"{self.base_url}{path}", params=params, headers=headers
+                ) as response:
+                    if response.status == 304:
+                        self._record_success()
+                        logger.info(f"ESPN: {path} не изменился (304), берём с диска")
+                        return await self._read_cached_json(key)
+                    if response.status >= 500 or response.status == 429:
+                        logger.error(f"Ошибка ESPN API: {response.status} (попытка {attempt + 1})")
+                        continue
+                    if response.status != 200:
+                        # 4xx не лечится повтором, но ESPN при этом доступен
+                        self.breaker.record_success()
+                        logger.error(f"Ошибка ESPN API: {response.status}")
+                        return await self._read_cached_json(key)
+                    body = await response.read()
+                    # Обрезанное/битое тело 200 - такая же неудача, как 5xx
+                    data = json.loads(body)
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                break
+            except asyncio.TimeoutError:
+                logger.error(f"Таймаут запроса к ESPN API: {path} (попытка {attempt + 1})")
+            except aiohttp.ClientError as e:
+                logger.error(f"Ошибка соединения с ESPN API: {e} (попытка {attempt + 1})")
+            except ValueError as e:
+                logger.error(f"Некорректный JSON от ESPN API: {path}: {e} (попытка {attempt + 1})")
+        else:
+            self.breaker.record_failure()
+            return await self._read_cached_json(key)
+        
+        self._record_success()
+        await asyncio.to_thread(self.http_cache.store, key, body, etag, last_modified)
+        return data
+    
+    async def _read_cached_json(self, key: str) -> Optional[Dict[str, Any]]:
+        """Последний сохранённый ответ с диска (чтение - в отдельном потоке)"""
+        body = await asyncio.to_thread(self.http_cache.read_body, key)
+        if body is None:
+            return None
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            logger.error(f"Повреждён HTTP-кэш {key}: {e}")
+            return None
+    
+    def _cache_get(self, key: Tuple, allow_stale: bool = False) -> Optional[ScoreboardSnapshot]:
+        """
+        Свежий ответ из кэша или None. Устаревшие записи остаются до вытеснения:
+        с allow_stale возвращается и устаревший снимок (пока ESPN недоступен)
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if not allow_stale and time.monotonic() >= expires_at:
+            return None
+        self._cache.move_to_end(key)
+        return data
+    
+    def _cache_put(self, key: Tuple, data: ScoreboardSnapshot, ttl: Optional[float] = None):
+        """Кладёт ответ в кэш, вытесняя самые давно использованные сверх cache_size"""
+        ttl = self.cache_ttl if ttl is None else ttl
+        self._cache[key] = (time.monotonic() + ttl, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Сбрасывает кэш (следующий вызов пойдёт в ESPN)"""
+        self._cache.clear()
+    
+    def _build_snapshot(self, data: Dict[str, Any]) -> ScoreboardSnapshot:
+        """Разбирает события и бои один раз и строит индекс по id события"""
+        by_id = {}
+        upcoming = []
+        for event in data.get("events", []):
+            parsed_event = self._parse_event(event)
+            if not parsed_event:
+                continue
+            by_id[parsed_event.id] = parsed_event
+            # Проверяем разными способами, что это UFC
+            if self._is_ufc_event(event):
+                upcoming.append(parsed_event)
+        
+        # Сортируем по дате (ближайшие первыми, без даты - в конце)
+        upcoming.sort(key=lambda x: (x.timestamp is None, x.timestamp or 0))
+        return ScoreboardSnapshot(by_id, upcoming)
+    
+    @staticmethod
+    def _scoreboard_request() -> Tuple[Tuple, Dict[str, str]]:
+        """Ключ кэша и параметры запроса scoreboard"""
+        params = {"limit": SCOREBOARD_LIMIT}
+        return ("/scoreboard", tuple(sorted(params.items()))), params
+    
+    async def warm_up(self) -> bool:
+        """
+        Холодный старт: кладёт в кэш снимок из последнего сохранённого на диске
+        ответа, чтобы первые запросы отвечали сразу, без ожидания ESPN
+        """
+        key, params = self._scoreboard_request()
+        data = await self._read_cached_json(self._http_key("/scoreboard", params))
+        if data is None:
+            return False
+        self._cache_put(key, self._build_snapshot(data))
+        logger.info("Снимок ESPN загружен из дискового кэша")
+        return True
+    
+    async def _get_scoreboard(self) -> Optional[ScoreboardSnapshot]:
+        """
+        Снимок scoreboard, общий для всех методов клиента
+        Пока он свежий (cache_ttl), повторные вызовы не ходят в ESPN
+        """
+        key, params = self._scoreboard_request()
+        snapshot = self._cache_get(key)
+        if snapshot is not None:
+            return snapshot
+        return await self._fetch_shared(key, params)
+    
+    async def refresh(self) -> Tuple[Optional[ScoreboardSnapshot], bool]:
+        """
+        Загружает снимок в обход TTL (для фонового опроса). Возвращает (снимок, fresh):
+        fresh=False - ESPN не ответил, снимок взят из памяти или с диска
+        """
+        started = time.monotonic()
+        key, params = self._scoreboard_request()
+        snapshot = await self._fetch_shared(key, params)
+        fresh = self._last_success_at is not None and self._last_success_at >= started
+        return snapshot, fresh
+    
+    def publish(self, snapshot: ScoreboardSnapshot, ttl: float):
+        """Публикует снимок: обработчики читают его из кэша ttl секунд, до следующего опроса"""
+        key, _ = self._scoreboard_request()
+        self._cache_put(key, snapshot, ttl)
+    
+    async def _fetch_shared(self, key: Tuple, params: Dict[str, str]) -> Optional[ScoreboardSnapshot]:
+        """Загрузка снимка, общая для всех одновременных вызовов с этим ключом"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_snapshot(key, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+    
+    async def _fetch_snapshot(self, key: Tuple, params: Dict[str, str]) -> Optional[ScoreboardSnapshot]:
+        """Одна загрузка scoreboard с разбором и записью в кэш"""
+        if self.breaker.state == OPEN:
+            # ESPN недоступен: последний снимок из памяти без запроса и разбора
+            stale = self._cache_get(key, allow_stale=True)
+            if stale is not None:
+                return stale
+        data = await self._get_json("/scoreboard", params)
+        if data is None:
+            return None
+        snapshot = self._build_snapshot(data)
+        self._cache_put(key, snapshot)
+        return snapshot
+    
+    async def get_upcoming_events(self) -> List[Event]:
+        """Получить предстоящие UFC события"""
+        try:
+            snapshot = await self._get_scoreboard()
+            if snapshot is None:
+                return []
+            
+            return list(snapshot.upcoming[:10])  # Ограничиваем 10 событиями
+            
+        except Exception as e:
+            logger.error(f"Ошибка при запросе к ESPN API: {e}")
+            return []
+    
+    def _is_ufc_event(self, event: Dict) -> bool:
+        """Проверяем, что это UFC событие"""
+        # Способ 1: По slug сезона
+        if event.get("season", {}).get("slug") == "ufc":
+            return True
+        
+        # Способ 2: По названию
+        name = event.get("name", "").upper()
+        if "UFC" in name or "ULTIMATE FIGHTING CHAMPIONSHIP" in name:
+            return True
+        
+        # Способ 3: По лиге
+        competitions = event.get("competitions", [])
+        if competitions:
+            league = competitions[0].get("league", {})
+            if league.get("slug") == "ufc":
+                return True
+        
+        return False
+    
+    def _parse_event(self, event: Dict) -> Optional[Event]:
+        """Парсим информацию о событии"""
+        try:
+            event_id = event.get("id")
+            name = event.get("name", "Неизвестный турнир")
+            
+            # Парсим дату
+            date_str = event.get("date", "")
+            timestamp = None
+            if date_str:
+                try:
+                    timestamp = datetime.fromisoformat(date_str.replace("Z", "+00:00")).timestamp()
+                except ValueError:
+                    logger.warning(f"Не удалось разобрать дату события {event_id}: {date_str}")
+            
+            # Парсим место
+            location = "Место не указано"
+            competitions = event.get("competitions", [])
+            if competitions:
+                venue = competitions[0].get("venue", {})
+                if venue:
+                    city = venue.get("address", {}).get("city", "")
+                    state = venue.get("address", {}).get("state", "")
+                    country = venue.get("address", {}).get("country", "")
+                    
+                    location_parts = []
+                    if city:
+                        location_parts.append(city)
+                    if state:
+                        location_parts.append(state)
+                    if country:
+                        location_parts.append(country)
+                    
+                    location = ", ".join(location_parts) if location_parts else venue.get("fullName", "Место не указано")
+            
+            return Event(
+                str(event_id),
+                name,
+                timestamp,
+                location,
+                tuple(self._parse_fights_from_event(event))
+            )
+            
+        except Exception as e:
+            logger.error(f"Ошибка при парсинге события: {e}")
+            return None
+    
+    async def get_event_fights(self, event_id: str) -> List[Dict]:
+        """Получить бои конкретного турнира (поиск по индексу снимка)"""
+        try:
+            # ESPN не имеет прямого endpoint для боёв, они уже разобраны из event
+            snapshot = await self._get_scoreboard()
+            if snapshot is None:
+                return []
+            
+            event = snapshot.by_id.get(str(event_id))
+            if not event:
+                logger.warning(f"Турнир {event_id} не найден в ответе")
+                return []
+            
+            # Копии: вызывающий код может менять бои, снимок общий
+            return [dict(fight) for fight in event.fights]
+            
+        except Exception as e:
+            logger.error(f"Ошибка при получении боёв турнира {event_id}: {e}")
+            return []
+    
+    def _parse_fights_from_event(self, event: Dict) -> List[Dict]:
+        """Парсим список боёв из события"""
+        fights = []
+        competitions = event.get("competitions", [])
+        
+        # ESPN хранит бои в competitions
+        for competition in competitions:
+            competitors = competition.get("competitors", [])
+            if len(competitors) >= 2:
+                fighter1 = competitors[0].get("athlete", {}).get("displayName", "Боец 1")
+                fighter2 = competitors[1].get("athlete", {}).get("displayName", "Боец 2")
+                
+                # Определяем тип боя (главный/предварительный)
+                competition_type = "Предварительный"
+                if competition.get("type", {}).get("slug") == "main":
+                    competition_type = "Главный"
+                
+                fights.append({
+                    "fighter1": fighter1,
+                    "fighter2": fighter2,
+                    "type": competition_type,
+                    "order": competition.get("order", 99)
+                })
+        
+        # ПРОБЛЕМА: ESPN возвращает бои в обратном порядке!
+        # Решение: переворачиваем весь список
+        fights.reverse()  # ← ВОТ ЭТА СТРОКА ИСПРАВИТ ПРОБЛЕМУ
+        
+        return fights
+    
+    async def get_event_by_id(self, event_id: str) -> Optional[Event]:
+        """Получить информацию о конкретном турнире по ID (поиск по индексу снимка)"""
+        try:
+            snapshot = await self._get_scoreboard()
+            if snapshot is None:
+                return None
+            
+            return snapshot.by_id.get(str(event_id))
+            
+        except Exception as e:
+            logger.error(f"Ошибка при получении турнира {event_id}: {e}")
+            return None
+    
+    async def get_raw_event(self, event_id: str) -> Optional[Dict]:
+        """
+        Сырой JSON события ESPN (поля, которых нет в Event). Снимки сырые
+        события не держат: они читаются из последнего ответа на диске
+        """
+        try:
+            _, params = self._scoreboard_request()
+            data = await self._read_cached_json(self._http_key("/scoreboard", params))
+            if data is None:
+                return None
+            
+            for event in data.get("events", []):
+                if str(event.get("id")) == str(event_id):
+                    return event
+            return None
+            
+        except Exception as e:
+            logger.error(f"Ошибка при чтении сырого события {event_id}: {e}")
+            return None
@@ -0,0 +1,72 @@
+"""
+Дисковый кэш HTTP-ответов для условных запросов (ETag / Last-Modified)
+
+На каждый запрос два файла в data/http_cache: <ключ>.body - тело последнего
+ответа 200, <ключ>.meta - валидаторы. Кэш переживает перезапуск бота
+"""
+import hashlib
+import json
+import os
+import logging
+from typing import Dict, Optional
+
+from utils.atomic_file import write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPDiskCache:
+    def __init__(self, cache_dir: str = os.path.join("data", "http_cache")):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        # Валидаторы в памяти: ключ -> {"etag", "last_modified", "url"}
+        self._meta: Dict[str, Dict[str, str]] = {}
+    
+    def _path(self, key: str, suffix: str) -> str:
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"{name}.{suffix}")
+    
+    def _load_meta(self, key: str) -> Dict[str, str]:
+        meta = self._meta.get(key)
+        if meta is None:
+            try:
+                with open(self._path(key, "meta"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            self._meta[key] = meta
+        return meta
+    
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Заголовки If-None-Match / If-Modified-Since для запроса (пусто, если кэша нет)"""
+        meta = self._load_meta(key)
+        if not os.path.exists(self._path(key, "body")):
+            # Без тела ответ 304 нечем обслужить
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+    
+    def read_body(self, key: str) -> Optional[bytes]:
+        """Тело последнего успешного ответа или None"""
+        try:
+            with open(self._path(key, "body"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def store(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str]):
+        """
+        Сохраняет тело и валидаторы. Сначала тело, затем meta: валидаторы
+        на диске всегда относятся к лежащему рядом телу
+        """
+        try:
+            write_atomic(self._path(key, "body"), body)
+            meta = {"url": key, "etag": etag or "", "last_modified": last_modified or ""}
+            write_atomic(self._path(key, "meta"), json.dumps(meta).encode("utf-8"))
+            self._meta[key] = meta
+        except Exception as e:
+            logger.error(f"Ошибка записи HTTP-кэша {key}: {e}")
@@ -1,98 +1,556 @@
 """
-Утилиты для работы с JSON хранилищем
+Реестр активных турниров
+
+Источник истины - таблицы tournaments/fights в SQLite, активные турниры держатся
+в памяти в словаре по id события. JSON-файлы data/tournaments/<id>.json - только
+экспорт; data/current_tournament.json старого формата импортируется при первом запуске
+
+Чтения - синхронные, из памяти. Записи асинхронные: запросы к базе идут в поток
+AsyncDatabase, экспорт и архив пишутся через asyncio.to_thread, event loop не ждёт диск
 """
+import asyncio
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from db.database import Database, db
+from db.async_database import AsyncDatabase, async_db
+from utils.archive import TournamentArchive, build_archive_record
+from utils.atomic_file import write_atomic
 
 logger = logging.getLogger(__name__)
 
+# Через сколько дней после начала турнира он считается устаревшим
+# (для турнира без даты начала - после выбора)
+TOURNAMENT_TTL_DAYS = 7
+# Формат поля date (Event.date, UTC) - если в турнире нет timestamp
+TOURNAMENT_DATE_FORMAT = "%d.%m.%Y %H:%M"
+# Через сколько часов снова проверить устаревший турнир с нерассчитанными ставками
+UNSETTLED_RECHECK_HOURS = 6
+
+
+def _freeze(value: Any) -> Any:
+    """Делает неизменяемую копию: dict -> MappingProxyType, list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Обратно к изменяемым dict/list (для редактирования и записи в JSON)"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
 class JSONStorage:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(
+        self,
+        data_dir: str = "data",
+        compact: bool = True,
+        database: Optional[Database] = None,
+        archive: Optional[TournamentArchive] = None,
+        async_database: Optional[AsyncDatabase] = None
+    ):
         self.data_dir = data_dir
+        self.tournaments_dir = os.path.join(data_dir, "tournaments")
         self.current_tournament_path = os.path.join(data_dir, "current_tournament.json")
-        os.makedirs(data_dir, exist_ok=True)
+        self.db = database or db
+        # Записи в базу - через очередь потока БД (общую с расчётом ставок)
+        if async_database is None:
+            async_database = async_db if database is None else AsyncDatabase(self.db)
+        self.async_db = async_database
+        # Закрытые турниры (завершённые, отменённые, устаревшие) уходят в архив
+        self.archive = archive or TournamentArchive(data_dir)
+        # compact=True - JSON без отступов и поддержка частичной перезаписи,
+        # compact=False - читаемый JSON с отступами (каждая запись целиком)
+        self.compact = compact
+        os.makedirs(self.tournaments_dir, exist_ok=True)
+        
+        # Активные турниры в памяти: id события -> турнир (только чтение).
+        # Читаются из базы один раз, дальше обновляются нашими же записями
+        self._loaded = False
+        self._tournaments: Dict[str, Mapping[str, Any]] = {}
+        self._expires_at: Dict[str, Optional[datetime]] = {}
+        # Отсортированный список для list_tournaments, сбрасывается при изменениях
+        self._ordered: Optional[Tuple[Mapping[str, Any], ...]] = None
+        
+        # Сериализованные куски экспорта (только compact) по id турнира:
+        # ключ -> JSON значения, бои - отдельным списком, чтобы перезаписывать
+        # только изменённый бой
+        self._fragments: Dict[str, Dict[str, str]] = {}
+        self._fight_fragments: Dict[str, list] = {}
+        
+        # Записи выполняются по одной: между await реестр не меняется чужой записью
+        self._write_lock = asyncio.Lock()
+    
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        """Компактная сериализация одного значения"""
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    
+    def _build_fragments(self, tournament_id: str, data: Mapping[str, Any]):
+        """Сериализует турнир по кускам (верхние ключи и каждый бой отдельно)"""
+        fragments = {}
+        fight_fragments = []
+        for key, value in data.items():
+            if key == "fights":
+                fight_fragments = [self._dumps(_thaw(fight)) for fight in value]
+            else:
+                fragments[key] = self._dumps(_thaw(value))
+        self._fragments[tournament_id] = fragments
+        self._fight_fragments[tournament_id] = fight_fragments
+    
+    def _join_fragments(self, tournament_id: str, keys) -> str:
+        """Собирает JSON турнира из готовых кусков без повторной сериализации"""
+        fragments = self._fragments[tournament_id]
+        parts = []
+        for key in keys:
+            if key == "fights":
+                value = "[" + ",".join(self._fight_fragments[tournament_id]) + "]"
+            else:
+                value = fragments[key]
+            parts.append(f"{self._dumps(key)}:{value}")
+        return "{" + ",".join(parts) + "}"
     
-    def save_current_tournament(self, tournament_data: Dict[str, Any]) -> bool:
+    def _drop_fragments(self, tournament_id: str):
+        self._fragments.pop(tournament_id, None)
+        self._fight_fragments.pop(tournament_id, None)
+    
+    def _export_path(self, tournament_id: str) -> str:
+        return os.path.join(self.tournaments_dir, f"{tournament_id}.json")
+    
+    def _export(self, tournament_id: str, data: Mapping[str, Any], partial: bool = False):
         """
-        Сохраняет текущий активный турнир ТОЛЬКО в JSON
+        Экспорт турнира в data/tournaments/<id>.json. При partial=True куски уже
+        обновлены вызывающим кодом и собираются без повторной сериализации
+        Ошибка экспорта не отменяет запись в базу
         """
         try:
-            # Сохраняем в JSON
-            tournament_with_meta = {
-                **tournament_data,
-                "_meta": {
-                    "selected_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                    "active": True
+            if not self.compact:
+                payload = json.dumps(_thaw(data), indent=2, ensure_ascii=False)
+            elif partial:
+                payload = self._join_fragments(tournament_id, data.keys())
+            else:
+                self._build_fragments(tournament_id, data)
+                payload = self._join_fragments(tournament_id, data.keys())
+            write_atomic(self._export_path(tournament_id), payload.encode("utf-8"))
+        except Exception as e:
+            logger.error(f"Ошибка при экспорте турнира {tournament_id} в JSON: {e}")
+    
+    def _remember(self, data: Dict[str, Any]) -> Mapping[str, Any]:
+        """Кладёт турнир в реестр вместе со сроком его устаревания"""
+        tournament_id = str(data["id"])
+        tournament = _freeze(data)
+        self._tournaments[tournament_id] = tournament
+        self._expires_at[tournament_id] = self._get_expiry_time(data)
+        self._ordered = None
+        return tournament
+    
+    def _forget(self, tournament_id: str):
+        self._tournaments.pop(tournament_id, None)
+        self._ordered = None
+        self._expires_at.pop(tournament_id, None)
+        self._drop_fragments(tournament_id)
+    
+    async def _archive(self, tournament: Mapping[str, Any]):
+        """Дописывает закрытый турнир в архив вместе с итогами ставок"""
+        try:
+            totals = await self.async_db.get_tournament_totals(str(tournament["id"]))
+            await asyncio.to_thread(self.archive.append, build_archive_record(tournament, totals))
+        except Exception as e:
+            logger.error(f"Ошибка при архивации турнира {tournament.get('id')}: {e}")
+    
+    def _import_legacy_file(self) -> Optional[Dict[str, Any]]:
+        """
+        Переносит турнир из JSON-файла старого формата в базу (один раз,
+        когда в базе ещё нет активных турниров). Дата выбора сохраняется
+        """
+        if not os.path.exists(self.current_tournament_path):
+            return None
+        with open(self.current_tournament_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not data.get("id") or data.get("status", "active") != "active":
+            return None
+        if self.db.get_tournament(data["id"]) is not None:
+            # Уже в базе (например, устарел) - старый экспорт не воскрешает турнир
+            return None
+        if not self.db.save_tournament(data):
+            return None
+        logger.info(f"Турнир {data['id']} перенесён из JSON в базу данных")
+        return self.db.get_tournament(data["id"])
+    
+    def _load(self):
+        """Первое чтение активных турниров из базы"""
+        tournaments = self.db.get_active_tournaments()
+        if not tournaments:
+            legacy = self._import_legacy_file()
+            tournaments = [legacy] if legacy else []
+        for tournament in tournaments:
+            self._remember(tournament)
+        self._loaded = True
+    
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load()
+    
+    async def load(self):
+        """Читает активные турниры из базы заранее, не блокируя event loop (из main.py)"""
+        if not self._loaded:
+            await asyncio.to_thread(self._ensure_loaded)
+    
+    # ========== РЕЕСТР ТУРНИРОВ ==========
+    
+    def get_tournament(self, tournament_id: str) -> Optional[Mapping[str, Any]]:
+        """
+        Активный турнир по id события (поиск в словаре в памяти)
+        Возвращает неизменяемое представление; для правки - get_tournament_copy()
+        """
+        try:
+            self._ensure_loaded()
+            return self._tournaments.get(str(tournament_id))
+        except Exception as e:
+            logger.error(f"Ошибка при чтении турнира {tournament_id}: {e}")
+            return None
+    
+    def get_tournament_copy(self, tournament_id: str) -> Optional[Dict[str, Any]]:
+        """Изменяемая копия активного турнира"""
+        tournament = self.get_tournament(tournament_id)
+        return _thaw(tournament) if tournament is not None else None
+    
+    def list_tournaments(self) -> Tuple[Mapping[str, Any], ...]:
+        """Все активные турниры, последний выбранный - первым"""
+        try:
+            self._ensure_loaded()
+            if self._ordered is None:
+                self._ordered = tuple(sorted(
+                    self._tournaments.values(),
+                    key=lambda tournament: tournament["_meta"]["selected_at"] or "",
+                    reverse=True
+                ))
+            return self._ordered
+        except Exception as e:
+            logger.error(f"Ошибка при чтении списка турниров: {e}")
+            return ()
+    
+    async def get_known_ids(self, tournament_ids: List[str]) -> set:
+        """
+        id турниров, которые уже выбирались: активные и закрытые
+        (завершённые, отменённые, устаревшие) - по базе, а не только по реестру
+        """
+        return await self.async_db.get_tournament_ids(tournament_ids)
+    
+    async def activate_tournament(self, tournament_data: Dict[str, Any]) -> bool:
+        """
+        Делает турнир активным (добавляет в реестр). Другие активные турниры
+        не затрагиваются. Уже выбиравшийся турнир (активный или закрытый)
+        повторно не активируется: пересохранение заменило бы кард с результатами
+        и коэффициентами, а закрытие записало бы в архив второй раз
+        """
+        try:
+            await self.load()
+            async with self._write_lock:
+                tournament_id = str(tournament_data["id"])
+                if tournament_id in self._tournaments:
+                    logger.warning(f"Турнир {tournament_id} уже активен, повторная активация пропущена")
+                    return False
+                if await self.async_db.get_tournament_ids([tournament_id]):
+                    logger.warning(f"Турнир {tournament_id} уже закрыт, повторная активация пропущена")
+                    return False
+                
+                now = datetime.now().isoformat()
+                tournament_with_meta = {
+                    **_thaw(tournament_data),
+                    "status": "active",
+                    "_meta": {
+                        "selected_at": now,
+                        "updated_at": now,
+                        "active": True
+                    }
                 }
-            }
-            
-            with open(self.current_tournament_path, 'w', encoding='utf-8') as f:
-                json.dump(tournament_with_meta, f, indent=2, ensure_ascii=False)
+                
+                if not await self.async_db.save_tournament(tournament_with_meta):
+                    return False
+                
+                # Свою запись сразу кладём в реестр - перечитывать базу не нужно
+                tournament = self._remember(tournament_with_meta)
+                await asyncio.to_thread(self._export, tournament_id, tournament)
             
-            logger.info(f"Турнир сохранён в JSON: {tournament_data.get('name', 'Unknown')}")
+            logger.info(f"Турнир активирован: {tournament_data.get('name', 'Unknown')}")
             return True
             
         except Exception as e:
             logger.error(f"Ошибка при сохранении турнира: {e}")
             return False
     
-    def get_current_tournament(self) -> Optional[Dict[str, Any]]:
+    async def update_fights(
+        self,
+        tournament_id: str,
+        fight_updates: Dict[int, Dict[str, Any]],
+        **fields: Any
+    ) -> Optional[Mapping[str, Any]]:
         """
-        Получает текущий активный турнир ТОЛЬКО из JSON
+        Частичное обновление активного турнира без пересохранения всего карда:
+        fight_updates - {индекс_боя: {поле: значение}} (например, коэффициенты или победитель),
+        fields - поля верхнего уровня (bets_open, status, has_odds...)
+        
+        В базе обновляются только изменённые строки fights, в экспорте заново
+        сериализуются только изменённые бои и поля. Если статус меняется
+        с active, турнир уходит из реестра. Возвращает обновлённый турнир
+        (только чтение) или None
         """
         try:
-            if not os.path.exists(self.current_tournament_path):
-                return None
-            
-            with open(self.current_tournament_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Проверяем, не устарел ли турнир (больше 7 дней)
-            if self._is_tournament_expired(data):
-                logger.info("Турнир устарел, очищаем...")
-                self.clear_current_tournament()
-                return None
+            async with self._write_lock:
+                return await self._update_fights(str(tournament_id), fight_updates, fields)
+        except Exception as e:
+            logger.error(f"Ошибка при обновлении турнира {tournament_id}: {e}")
+            return None
+    
+    async def _update_fights(
+        self,
+        tournament_id: str,
+        fight_updates: Dict[int, Dict[str, Any]],
+        fields: Dict[str, Any]
+    ) -> Optional[Mapping[str, Any]]:
+        """update_fights под блокировкой записи"""
+        tournament = self.get_tournament(tournament_id)
+        if tournament is None:
+            return None
+        
+        fights = list(tournament.get("fights", ()))
+        valid_updates = {}
+        for fight_index, changes in fight_updates.items():
+            if 0 <= fight_index < len(fights):
+                valid_updates[fight_index] = changes
+            else:
+                logger.warning(f"Бой {fight_index} не найден в турнире {tournament_id}")
+        fight_updates = valid_updates
+        
+        if not await self.async_db.update_tournament(tournament_id, fight_updates, **fields):
+            return None
+        
+        if self.compact and tournament_id not in self._fragments:
+            self._build_fragments(tournament_id, tournament)
+        
+        updated = dict(tournament)
+        
+        if fight_updates:
+            for fight_index, changes in fight_updates.items():
+                fight = {**_thaw(fights[fight_index]), **changes}
+                fights[fight_index] = _freeze(fight)
+                if self.compact:
+                    self._fight_fragments[tournament_id][fight_index] = self._dumps(fight)
+            updated["fights"] = tuple(fights)
+        
+        meta = _thaw(updated.get("_meta", {}))
+        meta["updated_at"] = datetime.now().isoformat()
+        fields["_meta"] = meta
+        
+        for key, value in fields.items():
+            updated[key] = _freeze(value)
+            if self.compact:
+                self._fragments[tournament_id][key] = self._dumps(value)
+        
+        # Реестр обновляем сами: срок устаревания не меняется, куски актуальны
+        result = MappingProxyType(updated)
+        self._tournaments[tournament_id] = result
+        self._ordered = None
+        await asyncio.to_thread(self._export, tournament_id, result, True)
+        
+        logger.info(
+            f"Турнир {tournament_id} обновлён: боёв {len(fight_updates)}, полей {len(fields) - 1}"
+        )
+        
+        if updated.get("status", "active") != "active":
+            # Турнир завершён/отменён - он больше не активен (остаётся в базе и архиве)
+            self._forget(tournament_id)
+            await self._archive(result)
+        return result
+    
+    async def append_fights(self, tournament_id: str, fights: List[Dict[str, Any]]) -> Optional[Mapping[str, Any]]:
+        """
+        Дописывает новые бои в конец карда (например, бой добавили в турнир)
+        Индексы уже существующих боёв не меняются. Возвращает обновлённый турнир
+        """
+        try:
+            tournament_id = str(tournament_id)
+            async with self._write_lock:
+                tournament = self.get_tournament(tournament_id)
+                if tournament is None or not fights:
+                    return tournament
+                
+                start = len(tournament.get("fights", ()))
+                new_fights = {start + offset: dict(fight) for offset, fight in enumerate(fights)}
+                if not await self.async_db.add_fights(tournament_id, new_fights):
+                    return None
+                
+                updated = _thaw(tournament)
+                updated["fights"].extend(new_fights.values())
+                updated["_meta"]["updated_at"] = datetime.now().isoformat()
+                
+                result = _freeze(updated)
+                self._tournaments[tournament_id] = result
+                self._ordered = None
+                await asyncio.to_thread(self._export, tournament_id, result)
             
-            return data
+            logger.info(f"В турнир {tournament_id} добавлено боёв: {len(new_fights)}")
+            return result
             
         except Exception as e:
-            logger.error(f"Ошибка при чтении турнира: {e}")
+            logger.error(f"Ошибка при добавлении боёв в турнир {tournament_id}: {e}")
             return None
     
-    def clear_current_tournament(self) -> bool:
+    async def update_tournament(self, tournament_id: str, **fields: Any) -> Optional[Mapping[str, Any]]:
+        """Частичное обновление полей верхнего уровня (например, bets_open=False)"""
+        return await self.update_fights(tournament_id, {}, **fields)
+    
+    def _remove_export(self, tournament_id: str):
+        path = self._export_path(tournament_id)
+        if os.path.exists(path):
+            os.remove(path)
+    
+    async def close_tournament(self, tournament_id: str, status: str = "finished") -> bool:
         """
-        Очищает текущий турнир
+        Убирает турнир из активных: в базе он получает статус status
+        (finished, cancelled, expired). Экспорт устаревшего турнира удаляется
         """
+        tournament_id = str(tournament_id)
         try:
-            if os.path.exists(self.current_tournament_path):
-                os.remove(self.current_tournament_path)
-            logger.info("Текущий турнир очищен из JSON")
+            async with self._write_lock:
+                await self.async_db.update_tournament(tournament_id, status=status)
+                tournament = self._tournaments.get(tournament_id)
+                self._forget(tournament_id)
+                if tournament is not None:
+                    await self._archive({**tournament, "status": status})
+                if status == "expired":
+                    await asyncio.to_thread(self._remove_export, tournament_id)
+            logger.info(f"Турнир {tournament_id} закрыт со статусом {status}")
             return True
         except Exception as e:
-            logger.error(f"Ошибка при очистке турнира: {e}")
+            logger.error(f"Ошибка при закрытии турнира {tournament_id}: {e}")
             return False
     
-    def _is_tournament_expired(self, tournament_data: Dict) -> bool:
+    # ========== УСТАРЕВАНИЕ ==========
+    # Вызывается фоновым планировщиком (utils/scheduler.py), чтения его не проверяют
+    
+    def next_expiry(self) -> Optional[datetime]:
+        """Ближайший момент устаревания среди активных турниров (None - турниров нет)"""
+        self._ensure_loaded()
+        if not self._expires_at:
+            return None
+        # Турнир без даты выбора считается устаревшим сразу
+        return min(expires_at or datetime.min for expires_at in self._expires_at.values())
+    
+    async def expire_due(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Закрывает со статусом expired все турниры, срок которых наступил
+        Турнир с нерассчитанными ставками не закрывается: его срок откладывается
+        на UNSETTLED_RECHECK_HOURS, пока админ не завершит турнир
+        Возвращает id закрытых турниров
+        """
+        await self.load()
+        now = now or datetime.now()
+        due = [
+            tournament_id for tournament_id, expires_at in self._expires_at.items()
+            if expires_at is None or expires_at < now
+        ]
+        expired = []
+        for tournament_id in due:
+            if await self.async_db.has_unsettled_bets(tournament_id):
+                logger.warning(f"Турнир {tournament_id} устарел, но есть нерассчитанные ставки - не закрываем")
+                self._expires_at[tournament_id] = now + timedelta(hours=UNSETTLED_RECHECK_HOURS)
+                continue
+            logger.info(f"Турнир {tournament_id} устарел, закрываем...")
+            await self.close_tournament(tournament_id, status="expired")
+            expired.append(tournament_id)
+        return expired
+    
+    # ========== ТЕКУЩИЙ ТУРНИР ==========
+    # Текущий - последний выбранный из активных (для экранов с одним турниром)
+    
+    def get_current_tournament(self) -> Optional[Mapping[str, Any]]:
+        """Последний выбранный активный турнир (только чтение)"""
+        tournaments = self.list_tournaments()
+        return tournaments[0] if tournaments else None
+    
+    def get_current_tournament_copy(self) -> Optional[Dict[str, Any]]:
+        """
+        Изменяемая копия текущего турнира - для правки и последующего сохранения
+        """
+        tournament = self.get_current_tournament()
+        return _thaw(tournament) if tournament is not None else None
+    
+    async def save_current_tournament(self, tournament_data: Dict[str, Any]) -> bool:
+        """Сохраняет турнир как активный (он же становится текущим)"""
+        return await self.activate_tournament(tournament_data)
+    
+    async def update_current_fights(
+        self,
+        fight_updates: Dict[int, Dict[str, Any]],
+        **fields: Any
+    ) -> Optional[Mapping[str, Any]]:
+        """Частичное обновление текущего турнира (см. update_fights)"""
+        tournament = self.get_current_tournament()
+        if tournament is None:
+            return None
+        return await self.update_fights(tournament["id"], fight_updates, **fields)
+    
+    async def update_current_tournament(self, **fields: Any) -> Optional[Mapping[str, Any]]:
+        """Частичное обновление полей верхнего уровня текущего турнира"""
+        return await self.update_current_fights({}, **fields)
+    
+    async def clear_current_tournament(self) -> bool:
         """
-        Проверяет, не устарел ли турнир (прошло больше 7 дней)
+        Очищает текущий турнир: в базе он получает статус expired, экспорт удаляется
+        """
+        tournament = self.get_current_tournament()
+        if tournament is None:
+            return True
+        return await self.close_tournament(tournament["id"], status="expired")
+    
+    @staticmethod
+    def _get_start_time(tournament_data: Dict) -> Optional[datetime]:
+        """
+        Начало турнира (локальное время): timestamp события ESPN, для турниров,
+        выбранных до его появления, - поле date. None - дата неизвестна
+        """
+        timestamp = tournament_data.get("timestamp")
+        if timestamp is not None:
+            return datetime.fromtimestamp(timestamp)
+        try:
+            start = datetime.strptime(tournament_data.get("date") or "", TOURNAMENT_DATE_FORMAT)
+        except ValueError:
+            return None
+        return start.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    
+    def _get_expiry_time(self, tournament_data: Dict) -> Optional[datetime]:
+        """
+        Момент, после которого турнир устарел: TOURNAMENT_TTL_DAYS после начала,
+        без даты начала - больше 7 дней с выбора
+        None - ни одну дату прочитать не удалось, турнир считается устаревшим
         """
         try:
+            start = self._get_start_time(tournament_data)
+            if start is not None:
+                return start + timedelta(days=TOURNAMENT_TTL_DAYS)
+            
             meta = tournament_data.get("_meta", {})
             selected_at = meta.get("selected_at")
             
             if not selected_at:
-                return True
-            
-            selected_date = datetime.fromisoformat(selected_at)
-            days_passed = (datetime.now() - selected_date).days
+                return None
             
-            return days_passed > 7
+            # days_passed > 7 <=> прошло не меньше 8 полных суток
+            return datetime.fromisoformat(selected_at) + timedelta(days=TOURNAMENT_TTL_DAYS + 1)
         except:
-            return True
+            return None
 
 
 # Создаем глобальный экземпляр
@@ -0,0 +1,67 @@
+"""
+Фоновый планировщик устаревания турниров
+
+Чтения реестра турниров не проверяют сроки: турниры закрываются здесь,
+в одной задаче event loop, в момент наступления срока
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from utils.json_storage import JSONStorage, storage
+
+logger = logging.getLogger(__name__)
+
+# Максимальный сон между проверками: новые турниры подхватываются не позже
+MAX_SLEEP_SEC = 3600
+
+
+class ExpiryScheduler:
+    def __init__(self, tournament_storage: JSONStorage, max_sleep_sec: float = MAX_SLEEP_SEC):
+        self.storage = tournament_storage
+        self.max_sleep_sec = max_sleep_sec
+        self._task: Optional[asyncio.Task] = None
+
+    def _seconds_until_next(self) -> float:
+        """Сколько спать до ближайшего срока (не больше max_sleep_sec)"""
+        next_expiry = self.storage.next_expiry()
+        if next_expiry is None:
+            return self.max_sleep_sec
+        delay = (next_expiry - datetime.now()).total_seconds()
+        # +1 секунда: срок наступает строго после expires_at
+        return min(max(delay + 1, 0), self.max_sleep_sec)
+
+    async def run_once(self) -> list:
+        """Закрывает турниры, срок которых наступил. Возвращает их id"""
+        try:
+            expired = await self.storage.expire_due()
+        except Exception as e:
+            logger.error(f"Ошибка при закрытии устаревших турниров: {e}")
+            return []
+        if expired:
+            logger.info(f"Закрыто устаревших турниров: {len(expired)}")
+        return expired
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self._seconds_until_next())
+            await self.run_once()
+
+    async def start(self):
+        """
+        Запускает планировщик (вызывается из main.py внутри event loop)
+        Первая проверка выполняется сразу, до приёма сообщений
+        """
+        if self._task is None:
+            await self.run_once()
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Глобальный планировщик для общего хранилища турниров
+expiry_scheduler = ExpiryScheduler(storage)